@@ -0,0 +1,42 @@
+# Author / Maintainer : Rejoy Roy Mathews
+
+from replacement_policy  import replacement_policy
+from array import array
+
+class FIFO(replacement_policy):
+    '''First in first out replacement.
+    Each cache set keeps a round robin pointer to its oldest entry. Filling
+    the pointed entry moves the pointer to the next entry, hits do not change
+    the state. Entries are evicted in the order they were filled as long as
+    lines only leave the cache through evictions
+    '''
+
+    def __init__(self, size : int = 64, associativity : int = 1, line_size : int = 4) -> None:
+        super().__init__(size, associativity, line_size)
+        self._fifo_head = array('B', [0]) * self._cache_sets
+
+    def compute_to_evict(self, set_id : int) -> int :
+        '''Returns the oldest entry of the set'''
+        return self._fifo_head[set_id]
+
+    def cache_ent_acc(self, cache_idx) -> None :
+        '''Hits do not change the fill order'''
+
+    def cache_ent_fill(self, cache_idx) -> None :
+        '''Move the pointer past the entry when the oldest entry is filled'''
+        set_idx = cache_idx // self._cache_associativity
+        if cache_idx - set_idx*self._cache_associativity == self._fifo_head[set_idx]:
+            self._fifo_head[set_idx] = (self._fifo_head[set_idx] + 1) % self._cache_associativity
+
+    def set_range_state(self, first_set : int, last_set : int) -> array :
+        '''Returns the pointers of cache sets first_set to last_set - 1'''
+        return self._fifo_head[first_set:last_set]
+
+    def load_set_range_state(self, first_set : int, last_set : int, state : array) -> None :
+        '''Replaces the pointers of cache sets first_set to last_set - 1'''
+        self._fifo_head[first_set:last_set] = state
+
+    @property
+    def name(self) -> str:
+        '''Defines the replacement policy name'''
+        return 'First In First Out (FIFO) replacement policy'
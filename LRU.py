@@ -1,14 +1,18 @@
 # Author / Maintainer : Rejoy Roy Mathews
 
 from replacement_policy  import replacement_policy
+from array import array
+
+# End of a recency list, associativities are at most 16
+_NO_WAY = 0xff
 
 class LRU(replacement_policy):
     '''Return the least recenty used entry in a cache set.
     This entry can then be replaced with a new cache entry
     '''
 
-    def __init__(self, size : int = 64, associativity : int = 1) -> None:
-        super().__init__(size, associativity)
+    def __init__(self, size : int = 64, associativity : int = 1, line_size : int = 4) -> None:
+        super().__init__(size, associativity, line_size)
         self._age_vector = [] # LRU keeps track of age for all cache entries        
         for x in range (self._cache_entries): # Initialize age for all cache entries to 0
             self._age_vector.append(0)
@@ -47,7 +51,90 @@ class LRU(replacement_policy):
             else:
                self._age_vector[idx] += 1        
 
+    def set_range_state(self, first_set : int, last_set : int) -> list :
+        '''Returns the age of the entries in cache sets first_set to last_set - 1'''
+        return self._age_vector[first_set*self._cache_associativity:
+                                last_set*self._cache_associativity]
+
+    def load_set_range_state(self, first_set : int, last_set : int, state : list) -> None :
+        '''Replaces the age of the entries in cache sets first_set to last_set - 1'''
+        self._age_vector[first_set*self._cache_associativity:
+                         last_set*self._cache_associativity] = state
+
+    @property
+    def name(self) -> str:
+        '''Defines the replacement policy name'''
+        return 'Least Recently Used (LRU) replacement policy'
+
+class OrderedLRU(replacement_policy):
+    '''Least recently used replacement with constant time updates.
+    Each cache set keeps its entries in a doubly linked list ordered from
+    least to most recently used, so an access moves one entry to the end of
+    the list and the eviction candidate is always the first entry. The links
+    are flat arrays of way numbers indexed by cache entry, with the first and
+    last way of every set, about 2 Bytes per entry and per set. Lists start in
+    way order, so entries that were never accessed are evicted lowest first.
+    Picks the same entries to evict as LRU
+    '''
+
+    def __init__(self, size : int = 64, associativity : int = 1, line_size : int = 4) -> None:
+        super().__init__(size, associativity, line_size)
+        assoc = self._cache_associativity
+        # Previous (less recent) and next (more recent) way of every entry,
+        # _NO_WAY at the ends of the list
+        self._prev_way = array('B', [_NO_WAY] + list(range(assoc - 1))) * self._cache_sets
+        self._next_way = array('B', list(range(1, assoc)) + [_NO_WAY]) * self._cache_sets
+        # Least and most recently used way of every set
+        self._lru_way  = array('B', [0]) * self._cache_sets
+        self._mru_way  = array('B', [assoc - 1]) * self._cache_sets
+
+    def compute_to_evict(self, set_id : int) -> int :
+        '''
+        This method accepts the cache set ID and returns the least recently
+        used entry in the set, the first entry of its list
+        '''
+        return self._lru_way[set_id]
+
+    def cache_ent_acc(self, cache_idx) -> None :
+        '''
+        This method accepts the cache index and makes it the most recently
+        used entry of its cache set
+        '''
+        set_idx = cache_idx // self._cache_associativity
+        mru_way = self._mru_way[set_idx]
+        set_base_addr = set_idx*self._cache_associativity
+        way = cache_idx - set_base_addr
+        if way == mru_way:
+            return
+        prev_way, next_way = self._prev_way, self._next_way
+        # Unlink the entry, it is not the last entry so it has a next entry
+        before, after = prev_way[cache_idx], next_way[cache_idx]
+        if before == _NO_WAY:
+            self._lru_way[set_idx] = after
+        else:
+            next_way[set_base_addr + before] = after
+        prev_way[set_base_addr + after] = before
+        # Append it after the most recently used entry
+        next_way[set_base_addr + mru_way] = way
+        prev_way[cache_idx] = mru_way
+        next_way[cache_idx] = _NO_WAY
+        self._mru_way[set_idx] = way
+
+    def set_range_state(self, first_set : int, last_set : int) -> tuple :
+        '''Returns the lists of cache sets first_set to last_set - 1'''
+        first_idx = first_set*self._cache_associativity
+        last_idx  = last_set*self._cache_associativity
+        return (self._prev_way[first_idx:last_idx], self._next_way[first_idx:last_idx],
+                self._lru_way[first_set:last_set], self._mru_way[first_set:last_set])
+
+    def load_set_range_state(self, first_set : int, last_set : int, state : tuple) -> None :
+        '''Replaces the lists of cache sets first_set to last_set - 1'''
+        first_idx = first_set*self._cache_associativity
+        last_idx  = last_set*self._cache_associativity
+        (self._prev_way[first_idx:last_idx], self._next_way[first_idx:last_idx],
+         self._lru_way[first_set:last_set], self._mru_way[first_set:last_set]) = state
+
     @property
     def name(self) -> str:
         '''Defines the replacement policy name'''
-        return 'Least Recently Used (LRU) replacement policy'
\ No newline at end of file
+        return 'Least Recently Used (LRU) replacement policy'
@@ -1,15 +1,29 @@
 # Author / Maintainer : Rejoy Roy Mathews
+from array import array
+import io
+import struct
+
+# Binary memory dumps start with this magic followed by (address, data)
+# records of the addresses holding integer data. Records are little endian
+MEMORY_DUMP_MAGIC  = b'CSIMMDP1'
+MEMORY_DUMP_RECORD = struct.Struct('<QI')
+# Records formatted per buffered write
+DUMP_BATCH = 1 << 14
 
 class Memory(object):
     '''Generic Memory Model that takes allows initializing a memory with depth > 0.
     If an initial value is defined, the Memory initializes all the addresses
-    with the intial value
+    with the intial value. The latency (cycles) and bandwidth (Bytes per
+    cycle) define the time an access takes in the timing model
     '''
-    def __init__(self, name : str = 'default', depth : int = 0, init_value = 'X') -> None:
+    def __init__(self, name : str = 'default', depth : int = 0, init_value = 'X',
+                 latency : int = 100, bandwidth : int = 8) -> None:
         
+        self._set_timing(name, latency, bandwidth)
         self._memory_data_struct = {}
         self._depth = depth
         self._name = name
+        self._init_value = init_value
         self._memory_writes = 0
         self._memory_reads = 0
 
@@ -18,6 +32,12 @@ class Memory(object):
                 self._memory_data_struct[addr] = init_value
 
 
+    def _set_timing(self, name : str, latency : int, bandwidth : int) -> None:
+        if latency < 0 or bandwidth <= 0:
+            raise ValueError(f'Memory {name} : latency must not be negative and bandwidth must be > 0')
+        self._latency = latency
+        self._bandwidth = bandwidth
+
     def memory_write(self, addr : int, data : int) -> None:
         '''Memory Write Operation : Memory[addr] = data'''
         if self._depth > 0:
@@ -38,30 +58,440 @@ class Memory(object):
             self._memory_reads+=1
             return self._memory_data_struct[addr]            
 
+    def memory_read_block(self, addr : int, count : int) -> list:
+        '''Block read operation : returns Memory[addr : addr+count].
+        A block transfer is counted as a single memory read'''
+        try:
+            words = [self._memory_data_struct[word_addr] for word_addr in range(addr, addr + count)]
+        except KeyError as err:
+            print(f'Memory {self._name} : Out of range read addr={err.args[0]}')
+            return [None] * count
+        self._memory_reads+=1
+        return words
+
+    def memory_write_block(self, addr : int, words : list) -> None:
+        '''Block write operation : Memory[addr : addr+len(words)] = words.
+        A block transfer is counted as a single memory write'''
+        if self._depth > 0:
+            if addr + len(words) > self._depth:
+                raise IndexError(f'Memory {self._name} : Out of range write to addr={addr}')
+
+        self._memory_writes+=1
+        for offset, data in enumerate(words):
+            self._memory_data_struct[addr + offset] = data
+
+    def memory_load(self, contents) -> None:
+        '''Load (addr, data) pairs into the memory without counting them as
+        memory accesses'''
+        for addr, data in contents:
+            if self._depth > 0 and addr >= self._depth:
+                raise IndexError(f'Memory {self._name} : Out of range load to addr={addr}')
+            self._memory_data_struct[addr] = data
+
+    def add_access_counts(self, reads : int, writes : int) -> None:
+        '''Add accesses performed on another copy of this memory to the
+        read and write counts'''
+        self._memory_reads += reads
+        self._memory_writes += writes
+
+    @property
+    def access_counts(self) -> tuple:
+        '''Returns the (reads, writes) memory access counts'''
+        return self._memory_reads, self._memory_writes
+
+    def access_cycles(self, nbytes : int) -> int:
+        '''Cycles an access transferring nbytes Bytes takes, the latency plus
+        the transfer time'''
+        return self._latency - (-nbytes // self._bandwidth)
+
+    @property
+    def latency(self) -> int:
+        '''Access latency in cycles'''
+        return self._latency
+
+    @property
+    def bandwidth(self) -> int:
+        '''Bytes transferred per cycle'''
+        return self._bandwidth
+
+    def written_items(self):
+        '''Generator over the (addr, data) pairs holding data other than the
+        initial value, in address order'''
+        init_value = self._init_value
+        for addr in sorted(self._memory_data_struct):
+            data = self._memory_data_struct[addr]
+            if data != init_value:
+                yield addr, data
+
+    def checkpoint_state(self) -> dict:
+        '''Returns the addresses holding integer data and their data as
+        arrays, the memory state saved by a checkpoint'''
+        addrs, data = array('Q'), array('I')
+        for addr, word in self.written_items():
+            if isinstance(word, int):
+                addrs.append(addr)
+                data.append(word)
+        return {'addrs' : addrs, 'data' : data}
+
+    def restore_state(self, state : dict) -> None:
+        '''Replace the memory contents with the output of checkpoint_state of
+        any memory model. Not counted as memory accesses'''
+        self._memory_data_struct = {}
+        if self._depth > 0 and self._init_value:
+            self._memory_data_struct = dict.fromkeys(range(self._depth), self._init_value)
+        self.memory_load(zip(state['addrs'], state['data']))
+
+    def _dump_items(self, written_only : bool):
+        '''Generator over the (addr, data) pairs listed by a dump'''
+        if written_only:
+            return self.written_items()
+        return iter(self._memory_data_struct.items())
+
+    def dump(self, out, written_only : bool = False) -> None:
+        '''Write the memory contents as text to an open file, or only the
+        addresses holding data other than the initial value. Lines are
+        formatted and written in batches'''
+        self._dump_header(out)
+        out_lines = []
+        for addr, data in self._dump_items(written_only):
+            str_temp = hex(data) if isinstance(data, int) else data
+            out_lines.append(f'addr[{hex(addr)}] : {str_temp}.\n')
+            if len(out_lines) == DUMP_BATCH:
+                out.writelines(out_lines)
+                out_lines.clear()
+        out.writelines(out_lines)
+
+    def _dump_header(self, out) -> None:
+        out.write('=================='+'='*len(self._name) +'\n')
+        out.write(f'Memory {self._name} contents. \n')
+        out.write('=================='+'='*len(self._name) +'\n')
+
+    def dump_binary(self, out) -> None:
+        '''Write the addresses holding integer data and their data to an open
+        binary file, see MEMORY_DUMP_MAGIC'''
+        out.write(MEMORY_DUMP_MAGIC)
+        records = bytearray()
+        for addr, data in self.written_items():
+            if isinstance(data, int):
+                records += MEMORY_DUMP_RECORD.pack(addr, data)
+                if len(records) >= DUMP_BATCH*MEMORY_DUMP_RECORD.size:
+                    out.write(records)
+                    records.clear()
+        out.write(records)
+
+    @property
+    def init_value(self):
+        '''Value of the addresses that were never written'''
+        return self._init_value
+
     @property
     def name(self) -> str:
         '''Defines the memory name'''
         return self._name
 
-    def __str__(self) -> str:
-        out_str = ''
-        out_str = out_str + '=================='+'='*len(self._name) +'\n'       
-        out_str = out_str + f'Memory {self._name} contents. \n'
-        out_str = out_str + '=================='+'='*len(self._name) +'\n'
-        for k,v in self._memory_data_struct.items():
-            try:
-                hex(int(v))
-            except:
-                str_temp = v
-            else:
-                str_temp = hex(int(v))
-            out_str = out_str + f'addr[{hex(k)}] : {str_temp}.\n'
+    @property
+    def depth(self) -> int:
+        '''Number of addressable words, 0 if unbounded'''
+        return self._depth
 
-        return out_str
+    def __str__(self) -> str:
+        out = io.StringIO()
+        self.dump(out)
+        return out.getvalue()
 
     def stats(self) -> None:
         '''Displays the total number of memory read and write acceses'''
         out_str = ''
         out_str = out_str + f'Memory {self._name} total reads : {self._memory_reads} \n'
         out_str = out_str + f'Memory {self._name} total writes : {self._memory_writes} \n'
-        print(out_str)
\ No newline at end of file
+        print(out_str)
+
+
+class ArrayMemory(Memory):
+    '''Compact Memory Model of 32-bit words backed by a packed array.
+    A parallel byte array records which addresses were written, addresses that
+    were never written read back as the initial value. Allocating a memory of
+    any depth therefore costs a few bytes per word and no per address work
+    '''
+    def __init__(self, name : str = 'default', depth : int = 0, init_value = 'X',
+                 latency : int = 100, bandwidth : int = 8) -> None:
+
+        if depth <= 0:
+            raise ValueError(f'Memory {name} : ArrayMemory requires a depth > 0')
+        self._set_timing(name, latency, bandwidth)
+
+        self._depth = depth
+        self._name = name
+        self._memory_writes = 0
+        self._memory_reads = 0
+        self._init_value = init_value
+        self._memory_data_struct = array('I', [0]) * depth
+        # Non-zero for addresses holding written data
+        self._memory_data_known = bytearray(depth)
+
+    def memory_write(self, addr : int, data : int) -> None:
+        '''Memory Write Operation : Memory[addr] = data.
+        Writing a non integer value (such as the initial value) marks the
+        address as unwritten'''
+        if addr >= self._depth:
+            raise IndexError(f'Memory {self._name} : Out of range write to addr={addr}')
+
+        self._memory_writes+=1
+        if isinstance(data, int):
+            try:
+                self._memory_data_struct[addr] = data
+            except OverflowError:
+                raise ValueError(f'Memory {self._name} : data {hex(data)} written to addr={addr} '
+                                 'does not fit in a 32-bit word') from None
+            self._memory_data_known[addr] = 1
+        else:
+            self._memory_data_known[addr] = 0
+
+    def memory_read(self, addr : int) -> int:
+        '''Memory read operation : returns Memory[addr]'''
+        if addr < 0 or addr >= self._depth:
+            print(f'Memory {self._name} : Out of range read addr={addr}')
+            return None
+        self._memory_reads+=1
+        if self._memory_data_known[addr]:
+            return self._memory_data_struct[addr]
+        return self._init_value
+
+    def memory_read_block(self, addr : int, count : int) -> list:
+        '''Block read operation : returns Memory[addr : addr+count].
+        A block transfer is counted as a single memory read'''
+        if addr < 0 or addr + count > self._depth:
+            print(f'Memory {self._name} : Out of range read addr={addr}')
+            return [None] * count
+        self._memory_reads+=1
+        words = self._memory_data_struct[addr:addr+count].tolist()
+        known = self._memory_data_known[addr:addr+count]
+        if known.count(0):
+            words = [data if is_known else self._init_value for data, is_known in zip(words, known)]
+        return words
+
+    def memory_write_block(self, addr : int, words : list) -> None:
+        '''Block write operation : Memory[addr : addr+len(words)] = words.
+        A block transfer is counted as a single memory write. Non integer
+        values mark their addresses as unwritten'''
+        if addr < 0 or addr + len(words) > self._depth:
+            raise IndexError(f'Memory {self._name} : Out of range write to addr={addr}')
+
+        self._memory_writes+=1
+        try:
+            try:
+                self._memory_data_struct[addr:addr+len(words)] = array('I', words)
+                self._memory_data_known[addr:addr+len(words)] = b'\x01' * len(words)
+            except TypeError:
+                for offset, data in enumerate(words):
+                    if isinstance(data, int):
+                        self._memory_data_struct[addr + offset] = data
+                        self._memory_data_known[addr + offset] = 1
+                    else:
+                        self._memory_data_known[addr + offset] = 0
+        except OverflowError:
+            raise ValueError(f'Memory {self._name} : data written to addr={addr} '
+                             'does not fit in 32-bit words') from None
+
+    def memory_load(self, contents) -> None:
+        '''Load (addr, data) pairs into the memory without counting them as
+        memory accesses'''
+        for addr, data in contents:
+            if addr >= self._depth:
+                raise IndexError(f'Memory {self._name} : Out of range load to addr={addr}')
+            if isinstance(data, int):
+                self._memory_data_struct[addr] = data
+                self._memory_data_known[addr] = 1
+            else:
+                self._memory_data_known[addr] = 0
+
+    def restore_state(self, state : dict) -> None:
+        '''Replace the memory contents with the output of checkpoint_state of
+        any memory model. Not counted as memory accesses'''
+        self._memory_data_known[:] = bytes(self._depth)
+        self.memory_load(zip(state['addrs'], state['data']))
+
+    def memory_export(self, first_addr : int = 0, last_addr : int = None) -> tuple:
+        '''Returns copies of the words and written flags of addresses
+        first_addr to last_addr - 1'''
+        if last_addr is None:
+            last_addr = self._depth
+        return (self._memory_data_struct[first_addr:last_addr],
+                self._memory_data_known[first_addr:last_addr])
+
+    def memory_import(self, first_addr : int, words : array, known : bytearray) -> None:
+        '''Overwrite the words and written flags starting at first_addr with
+        the output of memory_export. Not counted as memory accesses'''
+        if first_addr + len(words) > self._depth or len(words) != len(known):
+            raise IndexError(f'Memory {self._name} : Out of range import to addr={first_addr}')
+        self._memory_data_struct[first_addr:first_addr+len(words)] = words
+        self._memory_data_known[first_addr:first_addr+len(known)] = known
+
+    def written_items(self):
+        '''Generator over the (addr, data) pairs of the written addresses'''
+        known = self._memory_data_known
+        addr = known.find(1)
+        while addr >= 0:
+            yield addr, self._memory_data_struct[addr]
+            addr = known.find(1, addr + 1)
+
+    def dump(self, out, written_only : bool = False) -> None:
+        '''Write the memory contents as text to an open file, or only the
+        written addresses. Lines are formatted a slice of the arrays at a time'''
+        if written_only:
+            return super().dump(out, True)
+        self._dump_header(out)
+        init_value = self._init_value
+        for first_addr in range(0, self._depth, DUMP_BATCH):
+            last_addr = min(first_addr + DUMP_BATCH, self._depth)
+            out.writelines([f'addr[{hex(addr)}] : {hex(data) if is_known else init_value}.\n'
+                            for addr, data, is_known in
+                            zip(range(first_addr, last_addr),
+                                self._memory_data_struct[first_addr:last_addr],
+                                self._memory_data_known[first_addr:last_addr])])
+
+
+class SparseMemory(Memory):
+    '''Paged Memory Model for large address spaces.
+    Addresses are grouped into pages of page_size words. A page is allocated
+    on the first write of data other than the initial value to any of its
+    addresses and reads from pages that were never written return the
+    initial value, so writing the initial value back (such as the read fills
+    echoed by a write-through cache) does not allocate pages. The depth defaults to the full
+    32-bit address space and may be as large as 2**64
+    '''
+    def __init__(self, name : str = 'default', depth : int = 1 << 32, init_value = 'X',
+                 page_size : int = 4096, latency : int = 100, bandwidth : int = 8) -> None:
+
+        if depth <= 0 or depth > (1 << 64):
+            raise ValueError(f'Memory {name} : SparseMemory depth must be within 1 and 2**64')
+        if page_size <= 0 or (page_size & (page_size - 1)):
+            raise ValueError(f'Memory {name} : SparseMemory page size must be a power of 2')
+        self._set_timing(name, latency, bandwidth)
+
+        self._depth = depth
+        self._name = name
+        self._memory_writes = 0
+        self._memory_reads = 0
+        self._init_value = init_value
+        self._page_size = page_size
+        self._page_bits = page_size.bit_length() - 1
+        self._page_mask = page_size - 1
+        # Allocated pages, page number -> list of page_size words
+        self._memory_data_struct = {}
+
+    def memory_write(self, addr : int, data : int) -> None:
+        '''Memory Write Operation : Memory[addr] = data'''
+        if addr < 0 or addr >= self._depth:
+            raise IndexError(f'Memory {self._name} : Out of range write to addr={addr}')
+
+        self._memory_writes+=1
+        page = self._memory_data_struct.get(addr >> self._page_bits)
+        if page is None:
+            if data == self._init_value:
+                return
+            page = [self._init_value] * self._page_size
+            self._memory_data_struct[addr >> self._page_bits] = page
+        page[addr & self._page_mask] = data
+
+    def memory_read(self, addr : int) -> int:
+        '''Memory read operation : returns Memory[addr]'''
+        if addr < 0 or addr >= self._depth:
+            print(f'Memory {self._name} : Out of range read addr={addr}')
+            return None
+        self._memory_reads+=1
+        page = self._memory_data_struct.get(addr >> self._page_bits)
+        if page is None:
+            return self._init_value
+        return page[addr & self._page_mask]
+
+    def memory_read_block(self, addr : int, count : int) -> list:
+        '''Block read operation : returns Memory[addr : addr+count].
+        A block transfer is counted as a single memory read'''
+        if addr < 0 or addr + count > self._depth:
+            print(f'Memory {self._name} : Out of range read addr={addr}')
+            return [None] * count
+        self._memory_reads+=1
+        words = []
+        while count > 0:
+            # Part of the block within the page holding addr
+            offset = addr & self._page_mask
+            chunk  = min(count, self._page_size - offset)
+            page = self._memory_data_struct.get(addr >> self._page_bits)
+            if page is None:
+                words.extend([self._init_value] * chunk)
+            else:
+                words.extend(page[offset:offset+chunk])
+            addr  += chunk
+            count -= chunk
+        return words
+
+    def memory_write_block(self, addr : int, words : list) -> None:
+        '''Block write operation : Memory[addr : addr+len(words)] = words.
+        A block transfer is counted as a single memory write'''
+        if addr < 0 or addr + len(words) > self._depth:
+            raise IndexError(f'Memory {self._name} : Out of range write to addr={addr}')
+
+        self._memory_writes+=1
+        start = 0
+        while start < len(words):
+            # Part of the block within the page holding addr
+            offset = addr & self._page_mask
+            chunk  = min(len(words) - start, self._page_size - offset)
+            page = self._memory_data_struct.get(addr >> self._page_bits)
+            if page is None and words[start:start+chunk].count(self._init_value) < chunk:
+                page = [self._init_value] * self._page_size
+                self._memory_data_struct[addr >> self._page_bits] = page
+            if page is not None:
+                page[offset:offset+chunk] = words[start:start+chunk]
+            addr  += chunk
+            start += chunk
+
+    def memory_load(self, contents) -> None:
+        '''Load (addr, data) pairs into the memory without counting them as
+        memory accesses'''
+        for addr, data in contents:
+            if addr < 0 or addr >= self._depth:
+                raise IndexError(f'Memory {self._name} : Out of range load to addr={addr}')
+            page = self._memory_data_struct.get(addr >> self._page_bits)
+            if page is None:
+                if data == self._init_value:
+                    continue
+                page = [self._init_value] * self._page_size
+                self._memory_data_struct[addr >> self._page_bits] = page
+            page[addr & self._page_mask] = data
+
+    def written_items(self):
+        '''Generator over the (addr, data) pairs of the allocated pages that
+        hold data other than the initial value'''
+        init_value = self._init_value
+        for page_num in sorted(self._memory_data_struct):
+            page_base = page_num << self._page_bits
+            for offset, data in enumerate(self._memory_data_struct[page_num]):
+                if data != init_value:
+                    yield page_base + offset, data
+
+    def restore_state(self, state : dict) -> None:
+        '''Replace the memory contents with the output of checkpoint_state of
+        any memory model. Not counted as memory accesses'''
+        self._memory_data_struct = {}
+        self.memory_load(zip(state['addrs'], state['data']))
+
+    def _dump_items(self, written_only : bool):
+        '''Lists the contents of the allocated pages only'''
+        if written_only:
+            return self.written_items()
+        return self._page_items()
+
+    def _page_items(self):
+        '''Generator over the (addr, data) pairs of the allocated pages'''
+        for page_num in sorted(self._memory_data_struct):
+            page_base = page_num << self._page_bits
+            page = self._memory_data_struct[page_num]
+            for offset in range(min(self._page_size, self._depth - page_base)):
+                yield page_base + offset, page[offset]
+
+    @property
+    def pages(self) -> int:
+        '''Number of allocated pages'''
+        return len(self._memory_data_struct)
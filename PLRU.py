@@ -0,0 +1,107 @@
+# Author / Maintainer : Rejoy Roy Mathews
+
+from replacement_policy  import replacement_policy
+
+class TreePLRU(replacement_policy):
+    '''Tree based pseudo least recently used replacement.
+    Each cache set keeps a binary tree of associativity - 1 bits over its
+    entries. Every bit points to the half of its subtree that was used less
+    recently, an access flips the bits on the path to the entry to point
+    away from it and the entry to evict is found by following the bits from
+    the root. Both take log2(associativity) steps
+    '''
+
+    def __init__(self, size : int = 64, associativity : int = 1, line_size : int = 4) -> None:
+        super().__init__(size, associativity, line_size)
+        # Tree bits of set s are at s*associativity + node, nodes are
+        # numbered 1 to associativity - 1 with the children of node n at
+        # 2n (bit 0) and 2n + 1 (bit 1). Entries are the leaves
+        self._tree_bits = bytearray(self._cache_entries)
+
+    def compute_to_evict(self, set_id : int) -> int :
+        '''Follow the tree bits from the root to the pseudo least recently
+        used entry of the set'''
+        set_base_addr = set_id*self._cache_associativity
+        tree_bits = self._tree_bits
+        node = 1
+        while node < self._cache_associativity:
+            node = 2*node + tree_bits[set_base_addr + node]
+        return node - self._cache_associativity
+
+    def cache_ent_acc(self, cache_idx) -> None :
+        '''Point the tree bits on the path to the accessed entry away from it'''
+        associativity = self._cache_associativity
+        set_base_addr = cache_idx - cache_idx % associativity
+        tree_bits = self._tree_bits
+        node = cache_idx - set_base_addr + associativity
+        while node > 1:
+            # A left child (even node) points its parent to the right
+            tree_bits[set_base_addr + (node >> 1)] = (node & 1) ^ 1
+            node >>= 1
+
+    def set_range_state(self, first_set : int, last_set : int) -> bytearray :
+        '''Returns the tree bits of cache sets first_set to last_set - 1'''
+        return self._tree_bits[first_set*self._cache_associativity:
+                               last_set*self._cache_associativity]
+
+    def load_set_range_state(self, first_set : int, last_set : int, state : bytearray) -> None :
+        '''Replaces the tree bits of cache sets first_set to last_set - 1'''
+        self._tree_bits[first_set*self._cache_associativity:
+                        last_set*self._cache_associativity] = state
+
+    @property
+    def name(self) -> str:
+        '''Defines the replacement policy name'''
+        return 'Tree Pseudo Least Recently Used (Tree-PLRU) replacement policy'
+
+
+class BitPLRU(replacement_policy):
+    '''Bit based pseudo least recently used (MRU bit) replacement.
+    Every entry has a bit that is set when the entry is accessed. Once all
+    the bits of a set are set, all but the accessed entry are cleared. The
+    first entry with a clear bit is evicted
+    '''
+
+    def __init__(self, size : int = 64, associativity : int = 1, line_size : int = 4) -> None:
+        super().__init__(size, associativity, line_size)
+        self._mru_bits = bytearray(self._cache_entries)
+        # Number of set bits in each cache set
+        self._mru_ct = bytearray(self._cache_sets)
+
+    def compute_to_evict(self, set_id : int) -> int :
+        '''Returns the first entry of the set whose bit is clear'''
+        set_base_addr = set_id*self._cache_associativity
+        idx = self._mru_bits.find(0, set_base_addr, set_base_addr + self._cache_associativity)
+        return idx - set_base_addr if idx >= 0 else 0
+
+    def cache_ent_acc(self, cache_idx) -> None :
+        '''Set the bit of the accessed entry, clearing the others of the set
+        once all are set'''
+        if self._mru_bits[cache_idx]:
+            return
+        set_idx = cache_idx // self._cache_associativity
+        self._mru_bits[cache_idx] = 1
+        self._mru_ct[set_idx] += 1
+        if self._mru_ct[set_idx] == self._cache_associativity:
+            set_base_addr = set_idx*self._cache_associativity
+            self._mru_bits[set_base_addr:set_base_addr + self._cache_associativity] = \
+                bytes(self._cache_associativity)
+            self._mru_bits[cache_idx] = 1
+            self._mru_ct[set_idx] = 1
+
+    def set_range_state(self, first_set : int, last_set : int) -> tuple :
+        '''Returns the bits of cache sets first_set to last_set - 1'''
+        return (self._mru_bits[first_set*self._cache_associativity:
+                               last_set*self._cache_associativity],
+                self._mru_ct[first_set:last_set])
+
+    def load_set_range_state(self, first_set : int, last_set : int, state : tuple) -> None :
+        '''Replaces the bits of cache sets first_set to last_set - 1'''
+        self._mru_bits[first_set*self._cache_associativity:
+                       last_set*self._cache_associativity] = state[0]
+        self._mru_ct[first_set:last_set] = state[1]
+
+    @property
+    def name(self) -> str:
+        '''Defines the replacement policy name'''
+        return 'Bit Pseudo Least Recently Used (Bit-PLRU) replacement policy'
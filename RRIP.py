@@ -0,0 +1,103 @@
+# Author / Maintainer : Rejoy Roy Mathews
+
+from replacement_policy  import replacement_policy
+
+# 2-bit re-reference prediction values
+_RRPV_MAX  = 3 # Distant re-reference
+_RRPV_LONG = 2 # Long re-reference
+
+class SRRIP(replacement_policy):
+    '''Static re-reference interval prediction replacement.
+    Every entry holds a 2-bit re-reference prediction value (RRPV). Hits
+    predict a near re-reference (0) and filled lines a long one (2). The
+    first entry of a set predicted for a distant re-reference (3) is evicted,
+    if there is none all the entries of the set are aged until one is
+    '''
+
+    def __init__(self, size : int = 64, associativity : int = 1, line_size : int = 4) -> None:
+        super().__init__(size, associativity, line_size)
+        self._rrpv = bytearray([_RRPV_MAX]) * self._cache_entries
+
+    def compute_to_evict(self, set_id : int) -> int :
+        '''Returns the first entry of the set with a distant RRPV, aging the
+        set when needed'''
+        set_base_addr = set_id*self._cache_associativity
+        set_end_addr  = set_base_addr + self._cache_associativity
+        rrpv = self._rrpv
+        idx = rrpv.find(_RRPV_MAX, set_base_addr, set_end_addr)
+        if idx < 0:
+            age = _RRPV_MAX - max(rrpv[set_base_addr:set_end_addr])
+            for idx in range(set_base_addr, set_end_addr):
+                rrpv[idx] += age
+            idx = rrpv.find(_RRPV_MAX, set_base_addr, set_end_addr)
+        return idx - set_base_addr
+
+    def cache_ent_acc(self, cache_idx) -> None :
+        '''A hit predicts a near re-reference'''
+        self._rrpv[cache_idx] = 0
+
+    def cache_ent_fill(self, cache_idx) -> None :
+        '''Filled lines are predicted a long re-reference'''
+        self._rrpv[cache_idx] = _RRPV_LONG
+
+    def set_range_state(self, first_set : int, last_set : int) -> bytearray :
+        '''Returns the RRPVs of cache sets first_set to last_set - 1'''
+        return self._rrpv[first_set*self._cache_associativity:
+                          last_set*self._cache_associativity]
+
+    def load_set_range_state(self, first_set : int, last_set : int, state : bytearray) -> None :
+        '''Replaces the RRPVs of cache sets first_set to last_set - 1'''
+        self._rrpv[first_set*self._cache_associativity:
+                   last_set*self._cache_associativity] = state
+
+    @property
+    def name(self) -> str:
+        '''Defines the replacement policy name'''
+        return 'Static Re-Reference Interval Prediction (SRRIP) replacement policy'
+
+
+class BRRIP(SRRIP):
+    '''Bimodal re-reference interval prediction replacement.
+    Like SRRIP, but filled lines are predicted a distant re-reference except
+    for one fill in every long_fill_interval, which is predicted a long one.
+    Lines that are never reused therefore leave the cache quickly, protecting
+    the working set from scans. The long fills are spaced by a counter per
+    cache set so that results do not depend on the order the sets are
+    simulated in
+    '''
+
+    def __init__(self, size : int = 64, associativity : int = 1, line_size : int = 4,
+                 long_fill_interval : int = 32) -> None:
+        super().__init__(size, associativity, line_size)
+        if long_fill_interval < 1 or long_fill_interval > 256:
+            raise ValueError('BRRIP long fill interval must be within 1 and 256')
+        self._long_fill_interval = long_fill_interval
+        # Fills of each cache set since its last long fill
+        self._fill_ct = bytearray(self._cache_sets)
+
+    def cache_ent_fill(self, cache_idx) -> None :
+        '''Filled lines are predicted a distant re-reference, except for one
+        in every long_fill_interval fills of the set'''
+        set_idx = cache_idx // self._cache_associativity
+        fill_ct = self._fill_ct[set_idx] + 1
+        if fill_ct == self._long_fill_interval:
+            self._rrpv[cache_idx] = _RRPV_LONG
+            fill_ct = 0
+        else:
+            self._rrpv[cache_idx] = _RRPV_MAX
+        self._fill_ct[set_idx] = fill_ct
+
+    def set_range_state(self, first_set : int, last_set : int) -> tuple :
+        '''Returns the RRPVs and fill counts of cache sets first_set to last_set - 1'''
+        return (super().set_range_state(first_set, last_set),
+                self._fill_ct[first_set:last_set])
+
+    def load_set_range_state(self, first_set : int, last_set : int, state : tuple) -> None :
+        '''Replaces the RRPVs and fill counts of cache sets first_set to last_set - 1'''
+        super().load_set_range_state(first_set, last_set, state[0])
+        self._fill_ct[first_set:last_set] = state[1]
+
+    @property
+    def name(self) -> str:
+        '''Defines the replacement policy name'''
+        return 'Bimodal Re-Reference Interval Prediction (BRRIP) replacement policy'
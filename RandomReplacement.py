@@ -0,0 +1,47 @@
+# Author / Maintainer : Rejoy Roy Mathews
+
+from replacement_policy  import replacement_policy
+from array import array
+
+class RandomReplacement(replacement_policy):
+    '''Random replacement.
+    Each cache set has its own 32-bit xorshift generator, seeded from the
+    seed and the set index, that picks the entry to evict. Accesses do not
+    change the state, and the entries evicted from a set only depend on the
+    seed and the number of evictions from the set
+    '''
+
+    def __init__(self, size : int = 64, associativity : int = 1, line_size : int = 4,
+                 seed : int = 1) -> None:
+        super().__init__(size, associativity, line_size)
+        self._seed = seed & 0xffffffff
+        # Generator state per cache set, 0 until the first eviction
+        self._rng_state = array('I', [0]) * self._cache_sets
+
+    def compute_to_evict(self, set_id : int) -> int :
+        '''Returns a random entry of the set'''
+        state = self._rng_state[set_id]
+        if not state:
+            # Spread the seed over the sets, xorshift needs a non-zero state
+            state = ((self._seed ^ (set_id * 0x9e3779b9)) & 0xffffffff) or 1
+        state ^= (state << 13) & 0xffffffff
+        state ^= state >> 17
+        state ^= (state << 5) & 0xffffffff
+        self._rng_state[set_id] = state
+        return state % self._cache_associativity
+
+    def cache_ent_acc(self, cache_idx) -> None :
+        '''Accesses do not change the state'''
+
+    def set_range_state(self, first_set : int, last_set : int) -> array :
+        '''Returns the generator state of cache sets first_set to last_set - 1'''
+        return self._rng_state[first_set:last_set]
+
+    def load_set_range_state(self, first_set : int, last_set : int, state : array) -> None :
+        '''Replaces the generator state of cache sets first_set to last_set - 1'''
+        self._rng_state[first_set:last_set] = state
+
+    @property
+    def name(self) -> str:
+        '''Defines the replacement policy name'''
+        return 'Random replacement policy'
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# Author / Maintainer : Rejoy Roy Mathews
+from cache_benchmark import bench_cache, bench_batch
+from cache_sweep import print_sweep_table, write_sweep_csv, int_list
+from replacement_policies import REPLACEMENT_POLICIES
+from trace_generator import TRACE_PATTERNS, generate_trace_arrays
+import argparse
+import itertools
+import sys
+
+SUITE_COLUMNS = ['pattern', 'cache_size', 'cache_assoc', 'cache_wr_policy', 'cache_line_size',
+                 'replacement_policy', 'accesses', 'hit_rate', 'acc_per_sec', 'batch_acc_per_sec']
+
+def run_suite(patterns : list, cache_sizes : list, cache_assocs : list,
+              cache_wr_policies : list, cache_line_sizes : list = (4,),
+              replacement_policies : list = ('lru',), length : int = 65536,
+              addr_range : int = 1 << 18, write_ratio : float = 0.3, seed : int = 1,
+              repeat : int = 3) -> list:
+    '''Generate a synthetic trace per access pattern and measure the
+    simulator throughput on every cache configuration, replaying the trace
+    one access at a time and as a batch. Returns one row per pattern and
+    configuration, configurations with fewer lines than the associativity
+    are skipped'''
+    rows = []
+    for pattern in patterns:
+        trace_arrays = generate_trace_arrays(length, pattern=pattern, addr_range=addr_range,
+                                             write_ratio=write_ratio, seed=seed)
+        ops, addrs, _ = trace_arrays
+        trace = [('W', address, address) if op else ('R', address, None)
+                 for op, address in zip(ops, addrs)]
+        for size, assoc, wr_policy, line_size, r_policy in itertools.product(
+                cache_sizes, cache_assocs, cache_wr_policies, cache_line_sizes, replacement_policies):
+            if size // line_size < assoc:
+                continue
+            acc_per_sec = bench_cache(trace, size, assoc, wr_policy, addr_range, repeat,
+                                      r_policy, line_size)
+            batch_acc_per_sec, hit_rate = bench_batch(trace_arrays, size, assoc, wr_policy,
+                                                      addr_range, repeat, r_policy, line_size)
+            rows.append({'pattern' : pattern, 'cache_size' : size, 'cache_assoc' : assoc,
+                         'cache_wr_policy' : wr_policy, 'cache_line_size' : line_size,
+                         'replacement_policy' : r_policy, 'accesses' : length,
+                         'hit_rate' : round(hit_rate, 6),
+                         'acc_per_sec' : round(acc_per_sec),
+                         'batch_acc_per_sec' : round(batch_acc_per_sec)})
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(
+             description='Measure cache simulator throughput over synthetic access patterns and cache configurations.')
+    parser.add_argument('--patterns', '-tp', default=','.join(TRACE_PATTERNS), type=lambda arg: arg.split(','), help=f'Comma separated access patterns out of {",".join(TRACE_PATTERNS)}. example: sequential,zipf', metavar='patterns', dest='patterns')
+    parser.add_argument('--cache_sizes', '-cs', default='4096,65536', type=int_list, help='Comma separated cache sizes. example: 1024,4096', metavar='cache_sizes', dest='cache_sizes')
+    parser.add_argument('--cache_assocs', '-ca', default='4', type=int_list, help='Comma separated cache associativities. example: 1,4,16', metavar='cache_assocs', dest='cache_assocs')
+    parser.add_argument('--cache_wr_policies', '-cwp', default='wb', type=lambda arg: arg.split(','), help='Comma separated cache write policies. example: wb,wt', metavar='cache_wr_policies', dest='cache_wr_policies')
+    parser.add_argument('--cache_line_sizes', '-cls', default='4,64', type=int_list, help='Comma separated cache line sizes in bytes. example: 16,64,256', metavar='cache_line_sizes', dest='cache_line_sizes')
+    parser.add_argument('--replacement_policies', '-rp', default='lru', type=lambda arg: arg.split(','), help=f'Comma separated replacement policies out of {",".join(REPLACEMENT_POLICIES)}. example: lru,tree_plru', metavar='replacement_policies', dest='replacement_policies')
+    parser.add_argument('--length', '-tl', default=65536, type=int, help='Number of accesses per pattern. example: 1000000', metavar='length', dest='length')
+    parser.add_argument('--addr_range', '-ar', default=1 << 18, type=int, help='Number of word addresses accessed, also the memory size. example: 1048576', metavar='addr_range', dest='addr_range')
+    parser.add_argument('--write_ratio', '-wr', default=0.3, type=float, help='Fraction of write accesses. example: 0.5', metavar='write_ratio', dest='write_ratio')
+    parser.add_argument('--seed', '-s', default=1, type=int, help='Random seed of the traces. example: 7', metavar='seed', dest='seed')
+    parser.add_argument('--repeat', '-r', default=3, type=int, help='Number of timed replays, the best is reported.', metavar='repeat', dest='repeat')
+    parser.add_argument('--out_file', '-of', type=str, help='Write the results as CSV to this file instead of printing a table.', metavar='out_file', dest='out_file')
+
+    args = parser.parse_args()
+
+    for pattern in args.patterns:
+        if pattern not in TRACE_PATTERNS:
+            parser.error(f'invalid pattern {pattern}, valid patterns are {", ".join(TRACE_PATTERNS)}')
+    for r_policy in args.replacement_policies:
+        if r_policy not in REPLACEMENT_POLICIES:
+            parser.error(f'invalid replacement policy {r_policy}, valid replacement policies are '
+                         f'{", ".join(REPLACEMENT_POLICIES)}')
+    for wr_policy in args.cache_wr_policies:
+        if wr_policy not in ('wb', 'wt'):
+            parser.error(f'invalid cache write policy {wr_policy}, valid write policies are wb, wt')
+
+    rows = run_suite(args.patterns, args.cache_sizes, args.cache_assocs, args.cache_wr_policies,
+                     args.cache_line_sizes, args.replacement_policies, args.length,
+                     args.addr_range, args.write_ratio, args.seed, args.repeat)
+    if args.out_file == '-':
+        write_sweep_csv(rows, sys.stdout, SUITE_COLUMNS)
+    elif args.out_file:
+        with open(args.out_file, 'w', newline='') as f:
+            write_sweep_csv(rows, f, SUITE_COLUMNS)
+    else:
+        print_sweep_table(rows, SUITE_COLUMNS)
+
+if __name__ == '__main__':
+    main()
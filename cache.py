@@ -1,16 +1,54 @@
 # Author / Maintainer : Rejoy Roy Mathews
 
-from Memory import Memory
+from Memory import Memory, ArrayMemory, DUMP_BATCH
+from array import array
 import replacement_policy as replacement_policy
+import prefetcher as prefetcher
 import math as math
+import io
+import struct
+
+# Cache entry state bits
+_ENTRY_VALID = 0x1
+_ENTRY_DIRTY = 0x2
+# Line was filled by a prefetch and has not been accessed since
+_ENTRY_PREFETCHED = 0x4
+
+# Binary cache dumps start with this magic and a header of the number of sets,
+# the associativity, the words per line and the number of entries dumped.
+# Every entry is its index, state bits and tag followed by a bitmap of the
+# line words holding written data and the line words. Little endian
+CACHE_DUMP_MAGIC  = b'CSIMCDP1'
+CACHE_DUMP_HEADER = struct.Struct('<IIII')
+CACHE_DUMP_ENTRY  = struct.Struct('<IB3xQ')
+# Bytes of binary dump records buffered per write
+DUMP_BUFFER_SIZE  = 1 << 16
+
+# Batch access op -> 1 for writes, 0 for reads
+_OP_IS_WRITE = {'R' : 0, 'W' : 1, 0 : 0, 1 : 1}
+
+def _write_flags(ops) -> list:
+    '''Returns the batch access ops as 1 for writes and 0 for reads. Raises a
+    ValueError for ops other than "R"/"W" and the op codes 0/1'''
+    try:
+        return [_OP_IS_WRITE[op] for op in (ops.tolist() if hasattr(ops, 'tolist') else ops)]
+    except (KeyError, TypeError):
+        raise ValueError('Specify "R" or 0 for read operations and "W" or 1 for write '
+                         'operations as the opcode for the operation') from None
 
 class Cache(object):
     '''Modelling a cache which is defined by its
-    Reference to the main memory,
+    Reference to the main memory (or a lower level cache),
     Reference to a cache replacement policy,
     size in Bytes - 64 Bytes to 64MBytes range,
     associativity - 1 to 16-way associativity support,
-    write policy - write back ("wb") or write through("wt") write policy support
+    write policy - write back ("wb") or write through("wt") write policy support,
+    line size in Bytes - 4 Bytes (a single word) to 1024 Bytes range. Lines are
+    filled from and written back to the external memory as a whole,
+    Reference to an optional prefetcher, which sees every demand access,
+    hit latency and miss penalty in cycles for the timing model. Without a
+    miss penalty, misses cost the time the external memory takes to
+    transfer a line
     '''
     def __init__(self,                
                 name : str = 'default',
@@ -18,7 +56,11 @@ class Cache(object):
                 associativity : int = 1,
                 write_policy : str = 'wt',
                 extern_memory : Memory = None,
-                r_policy : replacement_policy = None
+                r_policy : replacement_policy = None,
+                line_size : int = 4,
+                pf : prefetcher = None,
+                hit_latency : int = 1,
+                miss_penalty : int = None
                 ) -> None:
                 
         # Check cache size range - 64B to 64MB
@@ -35,6 +77,19 @@ class Cache(object):
                 Associativity must be a power of 2 and must be within the range of 1 to 16. \
                 Associativty "1" represents a direct-mapped cache')
 
+        # Check line size range - 4B to 1KB, a power of 2 with at least one
+        # cache set of lines
+        if(not(line_size >= 4 and line_size <= 1024) or
+            not(math.log2(line_size).is_integer()) or
+            size // line_size < associativity):
+
+            raise ValueError('Cache line size must be a power of 2 and must be within the range \
+                of 4Bytes and 1KBytes. \n \
+                The cache must hold at least "associativity" lines')
+
+        if(hit_latency < 0 or (miss_penalty is not None and miss_penalty < 0)):
+            raise ValueError('Cache hit latency and miss penalty must not be negative')
+
         if(not(write_policy == 'wb' or write_policy == 'wt')):
             raise ValueError('Valid cache policies include write back ("wb") and write through ("wt"). \
                     Provide "wb" or "wt" as input')
@@ -43,22 +98,49 @@ class Cache(object):
         self._write_policy        = write_policy # Cache write policy
         self._cache_size          = size # Cache size
         self._cache_associativity = associativity # Cache associaitivty
-        self._cache_entries       = int(self._cache_size / 4) # integer entries in the Cache are 4 bytes each
+        self._cache_line_size     = line_size # Cache line size in bytes
+        self._cache_line_words    = line_size // 4 # 4 byte words per cache line
+        self._cache_entries       = int(self._cache_size / line_size) # Cache entries hold one line each
         self._cache_sets          = int(self._cache_entries / self._cache_associativity) # Number of sets in a cache
         self._cache_set_bits      = int(math.log2(self._cache_sets)) # Cache set bits
-        # cache tagbits = address size - size of set bits
-        self._cache_tag_bits      = 32 - self._cache_set_bits
-        # Instantiate cache memory
-        self._cache_memory        = Memory(name+'_mem', self._cache_entries)
+        # Addresses are word addresses, offset bits select the word in a line
+        self._cache_offset_bits   = int(math.log2(self._cache_line_words))
+        # Address size covers the whole external memory, at least 32 bits.
+        # Unbounded memories (depth 0) take 64-bit addresses
+        memory_depth              = getattr(extern_memory, 'depth', 0)
+        self._cache_addr_bits     = max(32, (memory_depth - 1).bit_length()) if memory_depth else 64
+        # cache tagbits = address size - size of set bits - size of offset bits
+        self._cache_tag_bits      = self._cache_addr_bits - self._cache_set_bits - self._cache_offset_bits
+        # Address decoding masks and shifts, computed once for all accesses.
+        # address = | tag | set | offset |
+        self._cache_offset_mask   = (1 << self._cache_offset_bits) - 1
+        self._cache_set_shift     = self._cache_offset_bits
+        self._cache_set_mask      = self._cache_sets - 1
+        self._cache_tag_shift     = self._cache_offset_bits + self._cache_set_bits
+        # A line address is the tag and set fields together, address >> set
+        # shift. Lines are installed only for addresses within the address
+        # size, so the tag and set fields are not masked
+        # Instantiate cache memory, packed 32-bit words. The words of the line
+        # held by entry i start at i << offset bits
+        self._cache_memory        = ArrayMemory(name+'_mem', self._cache_entries * self._cache_line_words)
         # Link to the external memory and replacement policy for this cache
         self._extern_main_memory  = extern_memory
+        # Memories handing over lines together with their dirty state, such
+        # as the lower levels of an exclusive hierarchy, define memory_read_line
+        self._extern_read_line    = getattr(extern_memory, 'memory_read_line', None)
         self._replacement_policy  = r_policy
-        # Define datastructure for cache entry status
-        self._cache_entry_valid   = []
-        # Define datastructure for cache entry tag
-        self._cache_entry_tag     = []
-        # Define data structure for cache entry ditry
-        self._cache_entry_dirty   = []
+        # Define datastructure for cache entry status. One byte per entry
+        # holding the _ENTRY_VALID and _ENTRY_DIRTY bits, all initialized to 0
+        self._cache_entry_state   = bytearray(self._cache_entries)
+        # Define datastructure for cache entry tag, packed 32-bit tags or
+        # 64-bit tags for larger address sizes
+        self._cache_entry_tag     = array('I' if self._cache_tag_bits <= 32 else 'Q',
+                                          [0]) * self._cache_entries
+        # Index of resident lines, line address -> cache entry. Resolves
+        # hits with one lookup irrespective of the associativity
+        self._cache_line_index    = {}
+        # Number of valid entries in each cache set
+        self._cache_set_valid_ct  = array('I', [0]) * self._cache_sets
         # Total cache memory read count
         self._cache_rd_ct  = 0
         # Total cache memory write count
@@ -67,178 +149,838 @@ class Cache(object):
         self._cache_hits  = 0
         # Total cache misses
         self._cache_misses  = 0
-        # Initialize all cache entries status and dirty bits to 0
-        for x in range(self._cache_entries):
-            self._cache_entry_valid.append(0)
-            self._cache_entry_tag.append(0)        
-            self._cache_entry_dirty.append(0)
+        # Total bytes read from and written to the external memory
+        self._cache_bytes_rd = 0
+        self._cache_bytes_wr = 0
+        # Demand writes (excluding read miss fills) and the writes among them
+        # that allocated a line, used by the timing model
+        self._cache_demand_wr_ct = 0
+        self._cache_wr_misses    = 0
+        # Timing model parameters in cycles
+        self._hit_latency  = hit_latency
+        self._miss_penalty = miss_penalty
+        # Hooks used by a cache hierarchy, see set_eviction_listener and
+        # set_write_fill_listener
+        self._eviction_listener   = None
+        self._write_fill_listener = None
+        # Optional instrumentation, see cache_metrics.CacheMetrics
+        self._metrics             = None
+        # Prefetcher, lines waiting for a prefetch to complete (line address
+        # -> demand access count at which they fill) and prefetch counters
+        self._prefetcher          = pf
+        self._pf_pending          = {}
+        self._pf_acc_ct           = 0
+        self._pf_issued           = 0
+        self._pf_useful           = 0
+        self._pf_late             = 0
+        self._pf_useless          = 0
+        self._pf_bytes            = 0
 
     def _compute_cache_write_entry(self, address : int) -> int :
         '''Compute the cache entry to write to.
-        If a cache set is empty the first entry in the set is selected.
+        If the line is already cached the entry holding it is selected.
+        If the cache set has unused entries the first unused entry is selected.
         If the cache set is full the replacement policy computed entry is over-written
-        If the cache is partly full, the entry with a matching tag is selected, in the
-        absence of which the first unused entry is selected
         '''
-        # Cache set to write to.
-        cache_set_selected = int('{:032b}'.format(address)[self._cache_tag_bits:
-                                self._cache_tag_bits+self._cache_set_bits],2)            
-        
-        cache_set_empty    = 1
-        cache_set_full     = 1
+        cache_line = address >> self._cache_set_shift
+        # Single lookup in the line index resolves a hit in any set entry
+        cache_idx = self._cache_line_index.get(cache_line)
+        if cache_idx is not None:
+            # Indicate that a memory write is not needed even if dirty bit s 1
+            return cache_idx, 0
+
+        return self._select_fill_entry(cache_line), 1
 
+    def _select_fill_entry(self, cache_line : int) -> int :
+        '''Compute the cache entry to fill with a line that is not in the cache.
+        The first unused entry of the cache set is selected, if the cache set is
+        full the replacement policy computes the entry to evict
+        '''
+        # Cache set to write to.
+        cache_set_selected = cache_line & self._cache_set_mask
         set_idx = cache_set_selected*self._cache_associativity
 
-        for entr_idx in range(set_idx,set_idx+self._cache_associativity):
-            if(self._cache_entry_valid[entr_idx] == 1):
-                cache_set_empty = 0
-            if(self._cache_entry_valid[entr_idx] == 0):
-                cache_set_full  = 0
-        
-        cache_idx  = 0 #Select the cache index to write to
-        write_to_mem = 1 #Write to main memory
-
-        if(cache_set_empty): # Cache is empty            
-            cache_idx = set_idx # Select first entry in the set
-
-        elif(cache_set_full): #Cache is full
-            ent_in_cache = 0 #Check if entry exists in cache
-            # Check if there is a matching tag in cache
-            for entr_idx in range(set_idx,set_idx+self._cache_associativity):             
-                if((self._cache_entry_valid[entr_idx] == 1) and
-                    (self._cache_entry_tag[entr_idx]  == 
-                    int('{:032b}'.format(address)[0:self._cache_tag_bits],2))):
-                    cache_idx = entr_idx
-                    ent_in_cache = 1
-                    # Indicate that a memory write is not needed even if dirty bit s 1
-                    write_to_mem = 0
-                    break                  
-            # Else compute which entry to evict
-            if not (ent_in_cache):                 
-                eviction_index = self._replacement_policy.compute_to_evict(cache_set_selected)
-                cache_idx = set_idx + eviction_index
-
-        else: #Cache has some entries            
+        if(self._cache_set_valid_ct[cache_set_selected] < self._cache_associativity):
+            # Cache set has some unused entries. Write to first available entry
             for entr_idx in range(set_idx,set_idx+self._cache_associativity):
-                # Check if there is a matching tag                
-                if((self._cache_entry_valid[entr_idx] == 1) and
-                    (self._cache_entry_tag[entr_idx]  ==
-                    int('{:032b}'.format(address)[0:self._cache_tag_bits],2))):
-                    cache_idx = entr_idx
-                    # Indicate that a memory write is not needed even if dirty bit s 1
-                    write_to_mem = 0
-                    break
-                # Else write to first available entry
-                elif(self._cache_entry_valid[entr_idx] == 0):
-                    cache_idx = entr_idx
-                    break
-                
-        return cache_idx, write_to_mem
+                if not (self._cache_entry_state[entr_idx] & _ENTRY_VALID):
+                    return entr_idx
+
+        # Cache set is full. Compute which entry to evict
+        eviction_index = self._replacement_policy.compute_to_evict(cache_set_selected)
+        self._evict_cache_entry(set_idx + eviction_index)
+        return set_idx + eviction_index
+
+    def _entry_address(self, cache_idx : int) -> int :
+        '''Returns the address of the first word of the line held by a cache entry'''
+        return ((self._cache_entry_tag[cache_idx] << self._cache_tag_shift) |
+            ((cache_idx // self._cache_associativity) << self._cache_set_shift))
+
+    def _read_entry_line(self, cache_idx : int) -> list :
+        '''Returns the words of the line held by a cache entry'''
+        if self._cache_line_words == 1:
+            return [self._cache_memory.memory_read(cache_idx)]
+        return self._cache_memory.memory_read_block(cache_idx << self._cache_offset_bits,
+                                                    self._cache_line_words)
+
+    def _fetch_line(self, address : int) -> list :
+        '''Read the whole line holding address from the external memory.
+        Single word lines use plain reads, which cost the same as a block'''
+        self._cache_bytes_rd += self._cache_line_size
+        if self._cache_line_words == 1:
+            return [self._extern_main_memory.memory_read(address)]
+        return self._extern_main_memory.memory_read_block(address & ~self._cache_offset_mask,
+                                                          self._cache_line_words)
+
+    def _fetch_line_state(self, address : int) -> tuple :
+        '''Read the whole line holding address from the external memory and
+        return its (words, dirty). Lines are only dirty when the external
+        memory hands over a line that was not yet written back'''
+        if self._extern_read_line is None:
+            return self._fetch_line(address), False
+        self._cache_bytes_rd += self._cache_line_size
+        return self._extern_read_line(address & ~self._cache_offset_mask, self._cache_line_words)
+
+    def _write_back_line(self, address : int, words : list) -> None:
+        '''Write a whole line to the external memory'''
+        self._cache_bytes_wr += self._cache_line_size
+        if self._cache_line_words == 1:
+            self._extern_main_memory.memory_write(address, words[0])
+        else:
+            self._extern_main_memory.memory_write_block(address, words)
+
+    def _evict_cache_entry(self, cache_idx : int) -> None:
+        '''Evict the line held by a cache entry. The eviction listener, if any,
+        sees the line first and returns the line words and dirty state to
+        continue with. Dirty lines are written to the external memory before
+        the entry is invalidated'''
+        dirty = self._cache_entry_state[cache_idx] & _ENTRY_DIRTY
+        if self._eviction_listener is not None:
+            words, dirty = self._eviction_listener(self._entry_address(cache_idx),
+                                                   self._read_entry_line(cache_idx), dirty)
+            if dirty:
+                self._write_back_line(self._entry_address(cache_idx), words)
+        elif dirty:
+            # Write to main memory before writing to cache
+            self._write_back_line(self._entry_address(cache_idx),
+                                  self._read_entry_line(cache_idx))
+        if self._metrics is not None:
+            self._metrics.record_eviction(cache_idx // self._cache_associativity, dirty)
+        self._invalidate_cache_entry(cache_idx)
+
+    def _install_cache_entry(self, cache_idx : int, address : int) -> None:
+        '''Mark the cache entry as holding the line for address. Any line
+        previously held by the entry is dropped from the line index'''
+        if address >> self._cache_addr_bits or address < 0:
+            raise ValueError(f'Cache {self._name} : address {hex(address)} is outside the '
+                             f'{self._cache_addr_bits}-bit address space of its memory')
+        if(self._cache_entry_state[cache_idx] & _ENTRY_VALID):
+            # Evicted line is no longer resident
+            del self._cache_line_index[(self._cache_entry_tag[cache_idx] << self._cache_set_bits) |
+                                       (cache_idx // self._cache_associativity)]
+        else:
+            self._cache_set_valid_ct[cache_idx // self._cache_associativity] += 1
+        self._cache_line_index[address >> self._cache_set_shift] = cache_idx
+        self._cache_entry_state[cache_idx] = _ENTRY_VALID # Mark this entry as a valid cache entry
+        self._cache_entry_tag[cache_idx]   = address >> self._cache_tag_shift
+
+    def _invalidate_cache_entry(self, cache_idx : int) -> None:
+        '''Mark the cache entry as unused and drop it from the line index.
+        Dirty data is discarded, callers must write it back beforehand'''
+        if not (self._cache_entry_state[cache_idx] & _ENTRY_VALID):
+            return
+        if self._cache_entry_state[cache_idx] & _ENTRY_PREFETCHED:
+            # Prefetched line leaves the cache without being used
+            self._pf_useless += 1
+        del self._cache_line_index[(self._cache_entry_tag[cache_idx] << self._cache_set_bits) |
+                                   (cache_idx // self._cache_associativity)]
+        self._cache_set_valid_ct[cache_idx // self._cache_associativity] -= 1
+        self._cache_entry_state[cache_idx] = 0
 
     def _write_to_cache_wb(self, address : int, data : int, rd_dr_wr : bool = False) -> None:
         '''Write to a write-back cache includes writing only to the cache. \
             Writes to memory are limited to "dirty entries" in cache'''
-        # Invoke the function that actually writes to the cache memory
+        if(self._write_fill_listener is not None and not rd_dr_wr and
+           not self.contains(address)):
+            # Write miss, let the hierarchy allocate the line below first
+            self._write_fill_listener(address)
+        # Invoke the function that actually writes to the cache memory.
+        # A dirty entry selected for eviction is written back to main memory
         cache_idx, write_to_mem = self._compute_cache_write_entry(address)
-        # Inform the replacement policy about a cache access
-        self._replacement_policy.cache_ent_acc(cache_idx)
-        if(self._cache_entry_dirty[cache_idx] and write_to_mem):
-            # Write to main memory before writing to cache
-            mem_addr = (self._cache_entry_tag[cache_idx] <<
-                (self._cache_set_bits)) + int(cache_idx/self._cache_associativity)
+        if(write_to_mem and self._cache_line_words > 1):
+            # Write allocate, the rest of the line comes from main memory.
+            # The line is dirty after the write whatever its state below
+            self._cache_memory.memory_write_block(cache_idx << self._cache_offset_bits,
+                                                  self._fetch_line_state(address)[0])
+        # Inform the replacement policy about a cache fill or access
+        if(write_to_mem):
+            self._replacement_policy.cache_ent_fill(cache_idx)
+        else:
+            self._replacement_policy.cache_ent_acc(cache_idx)
 
-            cache_data = self._cache_memory.memory_read(cache_idx)
-            self._extern_main_memory.memory_write(mem_addr,cache_data)
-        
-        self._cache_memory.memory_write(cache_idx, data) # Write to cache memory
-        self._cache_entry_valid[cache_idx] = 1 # Mark this entry as a valid cache entry
+        # Write to cache memory
+        self._cache_memory.memory_write((cache_idx << self._cache_offset_bits) |
+                                        (address & self._cache_offset_mask), data)
+        if(write_to_mem):
+            self._install_cache_entry(cache_idx, address)
+            if(not rd_dr_wr):
+                self._cache_wr_misses+=1
 
         if(rd_dr_wr):
             # Dont update dirty bit cache read driven cache write
             # The are fetched are from memory and dont need any updating
-            self._cache_entry_dirty[cache_idx] = 0
+            self._cache_entry_state[cache_idx] &= ~_ENTRY_DIRTY
         else:
-            self._cache_entry_dirty[cache_idx] = 1 # Upadte dirty bit for the entry
-        self._cache_entry_tag[cache_idx]   = int('{:032b}'.format(address)[0:
-                                             self._cache_tag_bits],2)
+            self._cache_entry_state[cache_idx] |= _ENTRY_DIRTY # Upadte dirty bit for the entry
 
     def _write_to_cache_wt(self, address : int, data : int) -> None:
         '''Write to a write-through cache includes writing to the cache \
             and to the memory'''        
         # Always write to main memory    
+        self._cache_bytes_wr += 4
         self._extern_main_memory.memory_write(address,data)
         # Compute cache write index
         cache_idx, write_to_mem = self._compute_cache_write_entry(address)
-        # Inform the replacement policy about a cache access
-        self._replacement_policy.cache_ent_acc(cache_idx)
+        if(write_to_mem and self._cache_line_words > 1):
+            # Write allocate, the line (including the word just written) is
+            # read back from main memory
+            self._cache_memory.memory_write_block(cache_idx << self._cache_offset_bits,
+                                                  self._fetch_line(address))
+        # Inform the replacement policy about a cache fill or access
+        if(write_to_mem):
+            self._replacement_policy.cache_ent_fill(cache_idx)
+        else:
+            self._replacement_policy.cache_ent_acc(cache_idx)
         # writes to the cache memory
-        self._cache_memory.memory_write(cache_idx, data)
-        # Write through does not have the concept of dirty bit        
-        self._cache_entry_valid[cache_idx] = 1 #Mark this entry as a valid cache entry
-        self._cache_entry_tag[cache_idx]   = int('{:032b}'.format(address)[0:
-                                            self._cache_tag_bits],2) #Update set entry tag
+        self._cache_memory.memory_write((cache_idx << self._cache_offset_bits) |
+                                        (address & self._cache_offset_mask), data)
+        # Write through does not have the concept of dirty bit
+        if(write_to_mem):
+            self._install_cache_entry(cache_idx, address)
+            self._cache_wr_misses+=1
+
+    def _fill_line(self, address : int, words : list, rd_dr_wr : bool) -> int:
+        '''Write a whole line to the cache, allocating it if needed, and
+        return the entry holding it. The line is clean when filled on a read
+        (rd_dr_wr), otherwise a write-back cache marks it dirty and a
+        write-through cache also writes it to the memory. Read fills hold the
+        memory contents, they are not memory traffic'''
+        address &= ~self._cache_offset_mask
+        if(self._write_policy == 'wt'):
+            if not rd_dr_wr:
+                self._write_back_line(address, words)
+            elif self._cache_line_words == 1:
+                # Single word read fills are echoed to the memory as the
+                # original model did, without counting any bytes written
+                self._extern_main_memory.memory_write(address, words[0])
+        cache_idx, write_to_mem = self._compute_cache_write_entry(address)
+        # Inform the replacement policy about a cache fill or access
+        if(write_to_mem):
+            self._replacement_policy.cache_ent_fill(cache_idx)
+        else:
+            self._replacement_policy.cache_ent_acc(cache_idx)
+        if self._cache_line_words == 1:
+            self._cache_memory.memory_write(cache_idx, words[0])
+        else:
+            self._cache_memory.memory_write_block(cache_idx << self._cache_offset_bits, words)
+        if(write_to_mem):
+            self._install_cache_entry(cache_idx, address)
+        if(self._write_policy == 'wb' and not rd_dr_wr):
+            self._cache_entry_state[cache_idx] |= _ENTRY_DIRTY
+        else:
+            self._cache_entry_state[cache_idx] &= ~_ENTRY_DIRTY
+        return cache_idx
+
+    def _read_entry(self, address : int) -> int:
+        '''Count a cache read of address and return the entry holding its
+        line, filling the line from the external memory on a miss'''
+        self._cache_rd_ct+=1
+        cache_idx = self._cache_line_index.get(address >> self._cache_set_shift)
+        if cache_idx is not None:
+            self._cache_hits+=1
+            # Inform the replacement policy about a cache access
+            self._replacement_policy.cache_ent_acc(cache_idx)
+            return cache_idx
+
+        # Entry not available in the cache. Read the line from the main memory
+        # and update it into the cache for future use
+        self._cache_wr_ct+=1
+        self._cache_misses+=1
+        words, dirty = self._fetch_line_state(address)
+        return self._fill_line(address, words, not dirty)
 
     def write_to_cache(self, address : int, data : int, rd_dr_wr : bool = False) -> None:
         '''Write to the cache : Cache[fn(addr)] = data'''
         self._cache_wr_ct+=1
+        if(not rd_dr_wr):
+            self._cache_demand_wr_ct+=1
+        prefetch = self._prefetcher is not None and not rd_dr_wr
+        record   = self._metrics is not None and not rd_dr_wr
+        if prefetch or record:
+            hit = self.contains(address)
         if(self._write_policy == 'wb'):
             self._write_to_cache_wb(address,data, rd_dr_wr)
         else:
             self._write_to_cache_wt(address, data)
+        if prefetch:
+            self._prefetch_cache_acc(address, hit)
+        if record:
+            self._metrics.record_access(self.set_index(address), hit)
+
+    def write_line_to_cache(self, address : int, words : list, rd_dr_wr : bool = False) -> None:
+        '''Write all the words of the line holding address to the cache,
+        counted as a single cache write. The line is allocated without
+        reading it from the external memory'''
+        if len(words) != self._cache_line_words:
+            raise ValueError(f'Cache {self._name} : a line holds {self._cache_line_words} words')
+        self._cache_wr_ct+=1
+        self._fill_line(address, words, rd_dr_wr)
+
+    def record_victim_write(self) -> None:
+        '''Count a whole line written to the level below when an eviction
+        listener places the evicted line there instead of writing it back'''
+        self._cache_bytes_wr += self._cache_line_size
 
     def read_from_cache(self, address : int) -> hex:         
         '''Read from the cache'''
+        cache_idx = self._cache_line_index.get(address >> self._cache_set_shift)
+        hit = cache_idx is not None
+        if hit:
+            self._cache_rd_ct+=1
+            self._cache_hits+=1
+            # Inform the replacement policy about a cache access
+            self._replacement_policy.cache_ent_acc(cache_idx)
+        else:
+            cache_idx = self._read_entry(address)
+        data = self._cache_memory.memory_read((cache_idx << self._cache_offset_bits) |
+                                              (address & self._cache_offset_mask))
+        if self._prefetcher is not None:
+            self._prefetch_cache_acc(address, hit)
+        if self._metrics is not None:
+            self._metrics.record_access(self.set_index(address), hit)
+        return data
+
+    def read_line_from_cache(self, address : int) -> list:
+        '''Read all the words of the line holding address, counted as a
+        single cache read'''
+        if self._prefetcher is None and self._metrics is None:
+            return self._read_entry_line(self._read_entry(address))
+        hit = self.contains(address)
+        words = self._read_entry_line(self._read_entry(address))
+        if self._prefetcher is not None:
+            self._prefetch_cache_acc(address, hit)
+        if self._metrics is not None:
+            self._metrics.record_access(self.set_index(address), hit)
+        return words
+
+    def _prefetch_cache_acc(self, address : int, hit : bool) -> None:
+        '''Account for a demand access in the prefetch counters, fill the
+        prefetches that completed and issue the prefetches requested by the
+        prefetcher for this access'''
+        line_address = address & ~self._cache_offset_mask
+        prefetch_hit = False
+        if hit:
+            cache_idx = self._cache_line_index[address >> self._cache_set_shift]
+            if self._cache_entry_state[cache_idx] & _ENTRY_PREFETCHED:
+                # First demand access to a prefetched line
+                self._pf_useful += 1
+                self._cache_entry_state[cache_idx] &= ~_ENTRY_PREFETCHED
+                prefetch_hit = True
+        elif self._pf_pending.pop(line_address, None) is not None:
+            # The line was prefetched but missed before the prefetch completed
+            self._pf_late += 1
+
+        self._pf_acc_ct += 1
+        if self._pf_pending:
+            for pending_address, fill_acc_ct in list(self._pf_pending.items()):
+                if fill_acc_ct <= self._pf_acc_ct:
+                    del self._pf_pending[pending_address]
+                    self._fill_prefetch(pending_address)
+
+        depth = self.depth
+        for pf_address in self._prefetcher.cache_line_acc(line_address, not hit, prefetch_hit):
+            if(pf_address < 0 or (depth and pf_address + self._cache_line_words > depth) or
+               pf_address in self._pf_pending or self.contains(pf_address)):
+                continue
+            self._pf_issued += 1
+            if self._prefetcher.latency:
+                self._pf_pending[pf_address] = self._pf_acc_ct + self._prefetcher.latency
+            else:
+                self._fill_prefetch(pf_address)
+
+    def _fill_prefetch(self, line_address : int) -> None:
+        '''Fill a prefetched line, clean and marked as prefetched. Lines that
+        were brought into the cache otherwise in the meantime are skipped'''
+        if self.contains(line_address):
+            return
+        words, dirty = self._fetch_line_state(line_address)
+        self._pf_bytes += self._cache_line_size
+        cache_idx, _ = self._compute_cache_write_entry(line_address)
+        # Inform the replacement policy about a cache fill
+        self._replacement_policy.cache_ent_fill(cache_idx)
+        if self._cache_line_words == 1:
+            self._cache_memory.memory_write(cache_idx, words[0])
+        else:
+            self._cache_memory.memory_write_block(cache_idx << self._cache_offset_bits, words)
+        self._install_cache_entry(cache_idx, line_address)
+        self._cache_entry_state[cache_idx] |= _ENTRY_PREFETCHED
+        if dirty and self._write_policy == 'wb':
+            self._cache_entry_state[cache_idx] |= _ENTRY_DIRTY
+        elif dirty:
+            self._write_back_line(line_address, words)
+
+    def access_batch(self, ops, addrs, data = None) -> array:
+        '''Issue a batch of cache accesses in order.
+        ops holds "R"/"W" or the binary instruction file op codes 0 (read) and
+        1 (write), addrs the addresses and data the write data (ignored for
+        reads). Other ops raise a ValueError before any access is issued.
+        Any indexable sequence is accepted, such as lists, array.array or
+        NumPy arrays, and line addresses of NumPy inputs are computed with
+        vector operations. The accesses run in a single loop over local
+        references to the cache state, leaving the cache, the external memory
+        and all counters as if each access had been issued on its own.
+        Returns an array with 1 for every access that hit in the cache
+        (for writes, the line was already resident) and 0 otherwise
+        '''
+        if(self._prefetcher is not None or self._metrics is not None or
+           self._extern_read_line is not None):
+            # Prefetches fill lines between accesses, metrics record each
+            # access and lines filled from memory_read_line may be dirty,
+            # issue the accesses one by one
+            return self._access_each(ops, addrs, data)
+        try:
+            # NumPy arrays support vector shifts, lists and array.array raise
+            cache_lines = (addrs >> self._cache_set_shift).tolist()
+        except TypeError:
+            cache_lines = None
+        addrs = addrs.tolist() if hasattr(addrs, 'tolist') else list(addrs)
+        if cache_lines is None:
+            set_shift = self._cache_set_shift
+            cache_lines = [address >> set_shift for address in addrs]
+        writes = _write_flags(ops)
+        if data is not None and hasattr(data, 'tolist'):
+            data = data.tolist()
+
+        hits = array('B', bytes(len(addrs)))
+        write_back         = self._write_policy == 'wb'
+        line_fetch         = self._cache_line_words > 1
+        offset_bits        = self._cache_offset_bits
+        offset_mask        = self._cache_offset_mask
+        entry_state        = self._cache_entry_state
+        line_index_get     = self._cache_line_index.get
+        cache_ent_acc      = self._replacement_policy.cache_ent_acc
+        cache_ent_fill     = self._replacement_policy.cache_ent_fill
+        cache_memory_read  = self._cache_memory.memory_read
+        cache_memory_write = self._cache_memory.memory_write
+        cache_block_write  = self._cache_memory.memory_write_block
+        extern_read        = self._extern_main_memory.memory_read
+        extern_write       = self._extern_main_memory.memory_write
+        fetch_line         = self._fetch_line
+        fill_line          = self._fill_line
+        select_fill_entry  = self._select_fill_entry
+        install_entry      = self._install_cache_entry
+        write_fill         = self._write_fill_listener if write_back else None
+        rd_ct = wr_ct = read_hits = wt_wr_ct = fill_ct = demand_wr_ct = wr_miss_ct = 0
+
+        for acc_idx, cache_line in enumerate(cache_lines):
+            cache_idx = line_index_get(cache_line)
+            if writes[acc_idx]:
+                wr_ct += 1
+                demand_wr_ct += 1
+                address, wr_data = addrs[acc_idx], data[acc_idx]
+                if not write_back:
+                    wt_wr_ct += 1
+                    extern_write(address, wr_data)
+                if cache_idx is None:
+                    wr_miss_ct += 1
+                    if write_fill is not None:
+                        write_fill(address)
+                    cache_idx = select_fill_entry(cache_line)
+                    if line_fetch:
+                        cache_block_write(cache_idx << offset_bits, fetch_line(address))
+                    cache_ent_fill(cache_idx)
+                    cache_memory_write((cache_idx << offset_bits) | (address & offset_mask), wr_data)
+                    install_entry(cache_idx, address)
+                else:
+                    hits[acc_idx] = 1
+                    cache_ent_acc(cache_idx)
+                    cache_memory_write((cache_idx << offset_bits) | (address & offset_mask), wr_data)
+                if write_back:
+                    entry_state[cache_idx] |= _ENTRY_DIRTY
+            elif cache_idx is not None:
+                rd_ct += 1
+                read_hits += 1
+                hits[acc_idx] = 1
+                cache_ent_acc(cache_idx)
+                cache_memory_read((cache_idx << offset_bits) | (addrs[acc_idx] & offset_mask))
+            else:
+                # Read miss, the line is filled clean from the external memory
+                rd_ct += 1
+                wr_ct += 1
+                address = addrs[acc_idx]
+                if line_fetch:
+                    fill_line(address, fetch_line(address), True)
+                    continue
+                rd_data = extern_read(address)
+                fill_ct += 1
+                if not write_back:
+                    # Read fill echo, not counted as bytes written
+                    extern_write(address, rd_data)
+                cache_idx = select_fill_entry(cache_line)
+                cache_ent_fill(cache_idx)
+                cache_memory_write(cache_idx, rd_data)
+                install_entry(cache_idx, address)
+
+        self._cache_rd_ct    += rd_ct
+        self._cache_wr_ct    += wr_ct
+        self._cache_hits     += read_hits
+        self._cache_misses   += rd_ct - read_hits
+        self._cache_demand_wr_ct += demand_wr_ct
+        self._cache_wr_misses    += wr_miss_ct
+        # Single word line fills and write through writes move 4 bytes each
+        self._cache_bytes_rd += 4*fill_ct
+        self._cache_bytes_wr += 4*wt_wr_ct
+        return hits
+
+    def memory_read(self, addr : int) -> int:
+        '''Memory interface read, lets this cache act as the external memory
+        of a higher level cache'''
+        return self.read_from_cache(addr)
+
+    def memory_write(self, addr : int, data : int) -> None:
+        '''Memory interface write, lets this cache act as the external memory
+        of a higher level cache'''
+        self.write_to_cache(addr, data)
+
+    def memory_read_block(self, addr : int, count : int) -> list:
+        '''Memory interface block read. A block covering one line of this
+        cache is a single line read, other blocks are read word by word'''
+        if count == self._cache_line_words and not (addr & self._cache_offset_mask):
+            return self.read_line_from_cache(addr)
+        return [self.read_from_cache(word_addr) for word_addr in range(addr, addr + count)]
+
+    def memory_write_block(self, addr : int, words : list) -> None:
+        '''Memory interface block write. A block covering one line of this
+        cache is a single line write, other blocks are written word by word'''
+        if len(words) == self._cache_line_words and not (addr & self._cache_offset_mask):
+            self.write_line_to_cache(addr, words)
+        else:
+            for offset, data in enumerate(words):
+                self.write_to_cache(addr + offset, data)
+
+    def contains(self, address : int) -> bool:
+        '''Check if the line holding address is in the cache. Not counted as
+        a cache access'''
+        return (address >> self._cache_set_shift) in self._cache_line_index
+
+    def invalidate_line(self, address : int) -> tuple:
+        '''Drop the line holding address from the cache without writing it
+        back. Returns the (words, dirty) of the dropped line, or None if the
+        line was not in the cache'''
+        cache_idx = self._cache_line_index.get(address >> self._cache_set_shift)
+        if cache_idx is None:
+            return None
+        line = (self._read_entry_line(cache_idx),
+                bool(self._cache_entry_state[cache_idx] & _ENTRY_DIRTY))
+        self._invalidate_cache_entry(cache_idx)
+        return line
+
+    def extract_from_cache(self, address : int) -> tuple:
+        '''Read the line holding address and move it out of the cache, as done
+        by the lower levels of an exclusive hierarchy. Returns the (words,
+        dirty) of the line, the caller takes over writing back dirty data.
+        Lines that are not cached are read from the external memory without
+        allocating them'''
         self._cache_rd_ct+=1
-        cache_set_selected = int('{:032b}'.format(address)[self._cache_tag_bits:
-                                 self._cache_tag_bits+self._cache_set_bits],2)
+        line = self.invalidate_line(address)
+        if line is None:
+            self._cache_misses+=1
+            return self._fetch_line_state(address)
+        self._cache_hits+=1
+        return line
 
-        set_idx = cache_set_selected*self._cache_associativity
+    def set_eviction_listener(self, listener) -> None:
+        '''Register listener(address, words, dirty) -> (words, dirty), called
+        with every line evicted to make room for another. The returned line
+        words are written to the external memory if the returned dirty is set'''
+        self._eviction_listener = listener
 
-        for entr_idx in range(set_idx, set_idx + self._cache_associativity):
-                        if((self._cache_entry_tag[entr_idx] == 
-                        int('{:032b}'.format(address)[0:self._cache_tag_bits],2)) and
-                         (self._cache_entry_valid[entr_idx] == 1)):
-
-                            self._cache_hits+=1
-                            # Inform the replacement policy about a cache access
-                            self._replacement_policy.cache_ent_acc(entr_idx)
-                            return self._cache_memory.memory_read(entr_idx)
-                                 
-        # Entry not available in the cache. Read from the main memory        
-        extern_memory_read = self._extern_main_memory.memory_read(address)
-        # Update this read data into the cache for future use        
-        self.write_to_cache(address, extern_memory_read, True)
-        self._cache_misses+=1
-        return extern_memory_read
+    def set_metrics(self, metrics) -> None:
+        '''Attach a cache_metrics.CacheMetrics recording the demand accesses
+        and evictions of the cache, None detaches it'''
+        if metrics is not None:
+            metrics.attach(self)
+        self._metrics = metrics
+
+    def set_write_fill_listener(self, listener) -> None:
+        '''Register listener(address), called on write-back cache write misses
+        before the line is allocated'''
+        self._write_fill_listener = listener
+
+    def _access_each(self, ops, addrs, data = None) -> array:
+        '''access_batch through the per access read and write methods'''
+        writes = _write_flags(ops)
+        hits = array('B', bytes(len(addrs)))
+        for acc_idx, address in enumerate(addrs.tolist() if hasattr(addrs, 'tolist') else addrs):
+            hits[acc_idx] = self.contains(address)
+            if writes[acc_idx]:
+                self.write_to_cache(address, data[acc_idx])
+            else:
+                self.read_from_cache(address)
+        return hits
+
+    def set_index(self, address : int) -> int:
+        '''Returns the cache set an address maps to'''
+        return (address >> self._cache_set_shift) & self._cache_set_mask
+
+    def set_range_state(self, first_set : int, last_set : int) -> dict:
+        '''Returns the state of cache sets first_set to last_set - 1 (entries,
+        data and replacement policy state) together with the cache access
+        counters. Used to merge the results of a cache that only simulated
+        accesses to these sets'''
+        first_idx = first_set*self._cache_associativity
+        last_idx  = last_set*self._cache_associativity
+        data, data_known = self._cache_memory.memory_export(first_idx << self._cache_offset_bits,
+                                                            last_idx << self._cache_offset_bits)
+        return {'entry_state'  : self._cache_entry_state[first_idx:last_idx],
+                'entry_tag'    : self._cache_entry_tag[first_idx:last_idx],
+                'set_valid_ct' : self._cache_set_valid_ct[first_set:last_set],
+                'data'         : data,
+                'data_known'   : data_known,
+                'r_policy'     : self._replacement_policy.set_range_state(first_set, last_set),
+                'counters'     : self.access_counts,
+                'bytes_moved'  : self.bytes_moved,
+                'write_counts' : (self._cache_demand_wr_ct, self._cache_wr_misses)}
+
+    def load_set_range_state(self, first_set : int, last_set : int, state : dict) -> None:
+        '''Replace cache sets first_set to last_set - 1 with the output of
+        set_range_state, leaving the access counters of this cache as they are'''
+        first_idx = first_set*self._cache_associativity
+        last_idx  = last_set*self._cache_associativity
+        for cache_idx in range(first_idx, last_idx):
+            self._invalidate_cache_entry(cache_idx)
+        self._cache_entry_state[first_idx:last_idx]  = state['entry_state']
+        self._cache_entry_tag[first_idx:last_idx]    = state['entry_tag']
+        self._cache_set_valid_ct[first_set:last_set] = state['set_valid_ct']
+        self._cache_memory.memory_import(first_idx << self._cache_offset_bits,
+                                         state['data'], state['data_known'])
+        self._replacement_policy.load_set_range_state(first_set, last_set, state['r_policy'])
+        for cache_idx in range(first_idx, last_idx):
+            if(self._cache_entry_state[cache_idx] & _ENTRY_VALID):
+                self._cache_line_index[(self._cache_entry_tag[cache_idx] << self._cache_set_bits) |
+                                       (cache_idx // self._cache_associativity)] = cache_idx
+
+    def merge_set_range_state(self, first_set : int, last_set : int, state : dict) -> None:
+        '''Replace cache sets first_set to last_set - 1 with the output of
+        set_range_state and add its access counters to this cache'''
+        self.load_set_range_state(first_set, last_set, state)
+        rd_ct, wr_ct, hits, misses = state['counters']
+        self._cache_rd_ct  += rd_ct
+        self._cache_wr_ct  += wr_ct
+        self._cache_hits   += hits
+        self._cache_misses += misses
+        bytes_rd, bytes_wr = state['bytes_moved']
+        self._cache_bytes_rd += bytes_rd
+        self._cache_bytes_wr += bytes_wr
+        demand_wr_ct, wr_misses = state['write_counts']
+        self._cache_demand_wr_ct += demand_wr_ct
+        self._cache_wr_misses    += wr_misses
+
+    def checkpoint_state(self) -> dict:
+        '''Returns the state of all the cache entries (see set_range_state)
+        without the access counters'''
+        state = self.set_range_state(0, self._cache_sets)
+        for counters in ('counters', 'bytes_moved', 'write_counts'):
+            del state[counters]
+        return state
+
+    def restore_state(self, state : dict) -> None:
+        '''Replace all the cache entries with the output of checkpoint_state.
+        Pending prefetches are dropped and the access counters are kept, so
+        that the statistics only cover the accesses issued after the restore'''
+        self._pf_pending.clear()
+        self.load_set_range_state(0, self._cache_sets, state)
+
+    @property
+    def access_counts(self) -> tuple:
+        '''Returns the (reads, writes, hits, misses) cache access counts'''
+        return self._cache_rd_ct, self._cache_wr_ct, self._cache_hits, self._cache_misses
+
+    @property
+    def bytes_moved(self) -> tuple:
+        '''Returns the bytes (read from, written to) the external memory'''
+        return self._cache_bytes_rd, self._cache_bytes_wr
+
+    @property
+    def prefetch_counts(self) -> tuple:
+        '''Returns the (issued, useful, late, useless) prefetch counts and the
+        bytes read from the external memory by prefetches'''
+        return self._pf_issued, self._pf_useful, self._pf_late, self._pf_useless, self._pf_bytes
+
+    @property
+    def miss_penalty(self) -> float:
+        '''Returns the cycles a miss takes, the configured miss penalty or
+        the time the external memory takes to transfer a line'''
+        if self._miss_penalty is not None:
+            return self._miss_penalty
+        return self._extern_main_memory.access_cycles(self._cache_line_size)
+
+    def access_cycles(self, nbytes : int) -> float:
+        '''Average cycles this cache takes to serve a read, used as the miss
+        penalty of a higher level cache'''
+        if not self._cache_rd_ct:
+            return self._hit_latency
+        return self._hit_latency + self._cache_misses / self._cache_rd_ct * self.miss_penalty
+
+    @property
+    def bandwidth(self) -> int:
+        '''Bytes per cycle the cache transfers to a higher level cache, a
+        line every cycle'''
+        return self._cache_line_size
+
+    @property
+    def busy_cycles(self) -> int:
+        '''Cycles the external memory spent transferring the bytes read and
+        written by the cache'''
+        return -(-(self._cache_bytes_rd + self._cache_bytes_wr) // self._extern_main_memory.bandwidth)
+
+    def timing(self) -> dict:
+        '''Timing model of the demand accesses issued to the cache.
+        Every access takes the hit latency, read misses and write misses that
+        fetch a multi-word line add the miss penalty. Write-through writes and
+        dirty write-backs go through a write buffer and only cost memory
+        bandwidth, so the total cycles are the access cycles or the cycles the
+        memory is busy transferring bytes, whichever is larger'''
+        accesses = self._cache_rd_ct + self._cache_demand_wr_ct
+        fetches  = self._cache_misses
+        if self._cache_line_words > 1:
+            fetches += self._cache_wr_misses
+        miss_penalty  = self.miss_penalty
+        access_cycles = accesses*self._hit_latency + fetches*miss_penalty
+        return {'hit_latency'   : self._hit_latency,
+                'miss_penalty'  : miss_penalty,
+                'amat'          : access_cycles / accesses if accesses else 0.0,
+                'access_cycles' : access_cycles,
+                'cycles'        : max(access_cycles, self.busy_cycles),
+                'bytes_read'    : self._cache_bytes_rd,
+                'bytes_written' : self._cache_bytes_wr}
+
+    @property
+    def depth(self) -> int:
+        '''Returns the depth of the external memory, 0 if unbounded'''
+        return self._extern_main_memory.depth
+
+    @property
+    def size(self) -> int:
+        '''Returns the cache size in Bytes'''
+        return self._cache_size
+
+    @property
+    def associativity(self) -> int:
+        '''Returns the cache associativity'''
+        return self._cache_associativity
+
+    @property
+    def line_size(self) -> int:
+        '''Returns the cache line size in Bytes'''
+        return self._cache_line_size
+
+    @property
+    def write_policy(self) -> str:
+        '''Returns the cache write policy'''
+        return self._write_policy
+
+    @property
+    def sets(self) -> int:
+        '''Returns the number of cache sets'''
+        return self._cache_sets
 
     @property
     def name(self) -> str:
         '''Returns the cache name'''
         return self._name
     
-    def __str__(self) -> str:        
-        out_str = ''
-        out_str = out_str + '=======================================================\n'
-        out_str = out_str + f'Cache name : {self._name} \n'           
-        out_str = out_str + f'Cache size : {self._cache_size}.\n'
-        out_str = out_str + f'Cache write policy : {self._write_policy}.\n'
-        out_str = out_str + f'Cache replacement policy : {self._replacement_policy.name}\n'
-        out_str = out_str + f'Cache Associativity : {self._cache_associativity}.\n'
-        out_str = out_str + f'Cache Memory Interface : {self._extern_main_memory.name}.\n'
-        out_str = out_str + '=======================================================\n'
-        out_str = out_str + f'Cache dump format - Cache[set index, set entry index]\n'
-        for set_idx in range(self._cache_sets):
-            for set_ent_idx in range(self._cache_associativity):
-                try :
-                    hex(int(self._cache_memory.memory_read(set_idx*self._cache_associativity + set_ent_idx)))
-                except:
-                    mem_content = self._cache_memory.memory_read(set_idx*self._cache_associativity + set_ent_idx)
-                else:
-                    mem_content = hex(int(self._cache_memory.memory_read(set_idx*self._cache_associativity + set_ent_idx)))
-                out_str = out_str + f'Cache[{hex(set_idx)},{hex(set_ent_idx)}] = \
-                    {mem_content}.\n'
+    def _dump_entries(self, valid_only : bool, dirty_only : bool) -> list:
+        '''Returns the cache entries listed by a dump'''
+        if dirty_only:
+            return [cache_idx for cache_idx, state in enumerate(self._cache_entry_state)
+                    if state & _ENTRY_DIRTY]
+        if valid_only:
+            return [cache_idx for cache_idx, state in enumerate(self._cache_entry_state)
+                    if state & _ENTRY_VALID]
+        return range(self._cache_entries)
+
+    def dump(self, out, valid_only : bool = False, dirty_only : bool = False) -> None:
+        '''Write the cache configuration and the contents of its entries as
+        text to an open file, optionally only the valid or dirty entries.
+        Lines are formatted and written in batches'''
+        out.write('=======================================================\n')
+        out.write(f'Cache name : {self._name} \n')
+        out.write(f'Cache size : {self._cache_size}.\n')
+        out.write(f'Cache write policy : {self._write_policy}.\n')
+        out.write(f'Cache replacement policy : {self._replacement_policy.name}\n')
+        out.write(f'Cache Associativity : {self._cache_associativity}.\n')
+        out.write(f'Cache line size : {self._cache_line_size}.\n')
+        out.write(f'Cache Memory Interface : {self._extern_main_memory.name}.\n')
+        out.write('=======================================================\n')
+        out.write(f'Cache dump format - Cache[set index, set entry index]\n')
+        words, known = self._cache_memory.memory_export()
+        init_value = self._cache_memory.init_value
+        line_words = self._cache_line_words
+        out_lines = []
+        for cache_idx in self._dump_entries(valid_only, dirty_only):
+            set_idx, set_ent_idx = divmod(cache_idx, self._cache_associativity)
+            first_word = cache_idx*line_words
+            mem_content = ' '.join([hex(data) if is_known else init_value for data, is_known in
+                                    zip(words[first_word:first_word + line_words],
+                                        known[first_word:first_word + line_words])])
+            out_lines.append(f'Cache[{hex(set_idx)},{hex(set_ent_idx)}] = '
+                             f'                    {mem_content}.\n')
+            if len(out_lines) == DUMP_BATCH:
+                out.writelines(out_lines)
+                out_lines.clear()
+        out.writelines(out_lines)
 
-        return out_str
+    def dump_binary(self, out, valid_only : bool = False, dirty_only : bool = False) -> None:
+        '''Write the cache entries, optionally only the valid or dirty ones,
+        to an open binary file. See CACHE_DUMP_MAGIC for the format'''
+        entries = self._dump_entries(valid_only, dirty_only)
+        out.write(CACHE_DUMP_MAGIC)
+        out.write(CACHE_DUMP_HEADER.pack(self._cache_sets, self._cache_associativity,
+                                         self._cache_line_words, len(entries)))
+        words, known = self._cache_memory.memory_export()
+        line_words = self._cache_line_words
+        line_format = struct.Struct(f'<{(line_words + 7) // 8}s{line_words}I')
+        records = bytearray()
+        for cache_idx in entries:
+            first_word = cache_idx*line_words
+            line_known = known[first_word:first_word + line_words]
+            # Bit i of the known bitmap is set if word i holds written data
+            known_bits = sum(1 << word_idx for word_idx, is_known in enumerate(line_known) if is_known)
+            records += CACHE_DUMP_ENTRY.pack(cache_idx, self._cache_entry_state[cache_idx],
+                                             self._cache_entry_tag[cache_idx])
+            records += line_format.pack(known_bits.to_bytes((line_words + 7) // 8, 'little'),
+                                        *words[first_word:first_word + line_words])
+            if len(records) >= DUMP_BUFFER_SIZE:
+                out.write(records)
+                records.clear()
+        out.write(records)
+
+    def __str__(self) -> str:
+        out = io.StringIO()
+        self.dump(out)
+        return out.getvalue()
+
+    def timing_stats(self) -> None:
+        '''Displays the timing model results'''
+        timing = self.timing()
+        out_str = ''
+        out_str = out_str + f'Cache {self._name} hit latency : {timing["hit_latency"]} cycles \n'
+        out_str = out_str + f'Cache {self._name} miss penalty : {timing["miss_penalty"]:.2f} cycles \n'
+        out_str = out_str + f'Cache {self._name} average memory access time : {timing["amat"]:.2f} cycles \n'
+        out_str = out_str + f'Cache {self._name} total cycles : {timing["cycles"]:.0f} \n'
+        out_str = out_str + f'Cache {self._name} bytes transferred : {timing["bytes_read"] + timing["bytes_written"]} \n'
+        print(out_str)
 
     def stats(self) -> None:
         out_str = ''
@@ -246,4 +988,13 @@ class Cache(object):
         out_str = out_str + f'Cache {self._name} total writes : {self._cache_wr_ct} \n'
         out_str = out_str + f'Cache {self._name} hits : {self._cache_hits} \n'
         out_str = out_str + f'Cache {self._name} misses : {self._cache_misses} \n'
+        out_str = out_str + f'Cache {self._name} bytes read from memory : {self._cache_bytes_rd} \n'
+        out_str = out_str + f'Cache {self._name} bytes written to memory : {self._cache_bytes_wr} \n'
+        if self._prefetcher is not None:
+            out_str = out_str + f'Cache {self._name} prefetcher : {self._prefetcher.name} \n'
+            out_str = out_str + f'Cache {self._name} prefetches issued : {self._pf_issued} \n'
+            out_str = out_str + f'Cache {self._name} useful prefetches : {self._pf_useful} \n'
+            out_str = out_str + f'Cache {self._name} late prefetches : {self._pf_late} \n'
+            out_str = out_str + f'Cache {self._name} useless prefetches : {self._pf_useless} \n'
+            out_str = out_str + f'Cache {self._name} prefetch bytes read from memory : {self._pf_bytes} \n'
         print(out_str)
\ No newline at end of file
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# Author / Maintainer : Rejoy Roy Mathews
+from cache import Cache
+from replacement_policies import REPLACEMENT_POLICIES
+from Memory import Memory
+from trace_reader import read_trace
+import argparse
+import time
+
+def load_trace(ins_file : str) -> list:
+    '''Parse an instruction file into a list of (op, address, data) tuples.
+    Parsing is kept out of the timed region so only cache accesses are measured
+    '''
+    return list(read_trace(ins_file))
+
+def bench_cache(trace : list, size : int = 4096, associativity : int = 4,
+                write_policy : str = 'wb', mem_size : int = 16384,
+                repeat : int = 3, replacement_policy : str = 'lru',
+                cache_line_size : int = 4) -> float:
+    '''Replay the trace on a freshly built cache "repeat" times and return
+    the best observed throughput in accesses per second
+    '''
+    best = 0.0
+    for _ in range(repeat):
+        memory = Memory('M0', mem_size)
+        cache  = Cache('C0', size, associativity, write_policy, memory,
+                       REPLACEMENT_POLICIES[replacement_policy](size, associativity, cache_line_size),
+                       cache_line_size)
+        start = time.perf_counter()
+        for op, address, data in trace:
+            if op == 'R':
+                cache.read_from_cache(address)
+            else:
+                cache.write_to_cache(address, data)
+        elapsed = time.perf_counter() - start
+        best = max(best, len(trace) / elapsed)
+    return best
+
+def bench_batch(trace : tuple, size : int = 4096, associativity : int = 4,
+                write_policy : str = 'wb', mem_size : int = 16384,
+                repeat : int = 3, replacement_policy : str = 'lru',
+                cache_line_size : int = 4) -> tuple:
+    '''Replay (ops, addrs, data) trace arrays with Cache.access_batch on a
+    freshly built cache "repeat" times. Returns the best observed throughput
+    in accesses per second and the hit rate, read hits over reads as in the
+    cache sweep
+    '''
+    best = 0.0
+    for _ in range(repeat):
+        memory = Memory('M0', mem_size)
+        cache  = Cache('C0', size, associativity, write_policy, memory,
+                       REPLACEMENT_POLICIES[replacement_policy](size, associativity, cache_line_size),
+                       cache_line_size)
+        start = time.perf_counter()
+        hits = cache.access_batch(*trace)
+        elapsed = time.perf_counter() - start
+        best = max(best, len(hits) / elapsed)
+    reads, _, read_hits, _ = cache.access_counts
+    return best, read_hits / reads if reads else 0.0
+
+def main():
+    parser = argparse.ArgumentParser(
+             description='Measure cache simulator throughput in accesses/second.')
+    parser.add_argument('--cache_size', '-cs', default=4096, type=int, help='The cache size. example: 4096', metavar='cache_size', dest='cache_size')
+    parser.add_argument('--cache_assoc', '-ca', default=4, type=int, help='The cache associativity. example: 4', metavar='cache_associativity', dest='cache_assoc')
+    parser.add_argument('--cache_wr_policy', '-cwp', default='wb', type=str, choices = ['wb','wt'], help='The cache write policy. write back or write through',
+                        metavar='cache_write_policy', dest='cache_wr_policy')
+    parser.add_argument('--replacement_policy', '-rp', default='lru', type=str, choices=list(REPLACEMENT_POLICIES), help='The cache replacement policy. example: tree_plru', metavar='replacement_policy', dest='replacement_policy')
+    parser.add_argument('--mem_size', '-ms', default=16384, type=int, help='The external memory size. example: 16384', metavar='mem_size', dest='mem_size')
+    parser.add_argument('--ins_file', '-if', default='mem_ins_auto_gen/autogen_ins.txt', type=str, help='File with sequence of instructions to replay.', metavar='ins_file', dest='ins_file')
+    parser.add_argument('--repeat', '-r', default=3, type=int, help='Number of timed replays, the best is reported.', metavar='repeat', dest='repeat')
+
+    args = parser.parse_args()
+
+    trace = load_trace(args.ins_file)
+    acc_per_sec = bench_cache(trace, args.cache_size, args.cache_assoc,
+                              args.cache_wr_policy, args.mem_size, args.repeat,
+                              args.replacement_policy)
+    print(f'{args.ins_file} : {len(trace)} accesses, {acc_per_sec:,.0f} accesses/second')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+# Author / Maintainer : Rejoy Roy Mathews
+from cache import Cache
+from LRU import OrderedLRU
+from Memory import Memory, SparseMemory
+from cache_sweep import print_sweep_table
+from trace_reader import read_trace
+from functools import partial
+import argparse
+
+INCLUSION_POLICIES = ('non-inclusive', 'inclusive', 'exclusive')
+
+HIERARCHY_COLUMNS = ['level', 'cache_size', 'cache_assoc', 'cache_wr_policy',
+                     'cache_reads', 'cache_writes', 'cache_hits', 'cache_misses',
+                     'hit_rate', 'back_invalidations', 'bytes_read', 'bytes_written',
+                     'hit_latency', 'amat', 'cycles']
+
+class _ExclusiveLink(object):
+    '''Memory interface of a lower level cache as seen by the level above it
+    in an exclusive hierarchy. Reads move lines up and out of the lower level.
+    Line fills of the level above take over the dirty state of the line with
+    memory_read_line, the line leaves the lower level so it is not duplicated.
+    Plain reads, which can not hand over a dirty line, write its dirty data to
+    the external memory of the hierarchy
+    '''
+    def __init__(self, lower : Cache, extern_memory : Memory) -> None:
+        self._lower = lower
+        self._extern_memory = extern_memory
+
+    def memory_read_line(self, addr : int, count : int = 1) -> tuple:
+        '''Move the line holding addr up and out of the lower level,
+        returns its (words, dirty)'''
+        return self._lower.extract_from_cache(addr)
+
+    def memory_read_block(self, addr : int, count : int) -> list:
+        words, dirty = self._lower.extract_from_cache(addr)
+        if dirty:
+            self._extern_memory.memory_write_block(addr, words)
+        return words
+
+    def memory_read(self, addr : int) -> int:
+        return self.memory_read_block(addr, 1)[0]
+
+    def memory_write_block(self, addr : int, words : list) -> None:
+        self._lower.memory_write_block(addr, words)
+
+    def memory_write(self, addr : int, data : int) -> None:
+        self._lower.write_to_cache(addr, data)
+
+    def access_cycles(self, nbytes : int) -> float:
+        return self._lower.access_cycles(nbytes)
+
+    @property
+    def bandwidth(self) -> int:
+        return self._lower.bandwidth
+
+    @property
+    def name(self) -> str:
+        return self._lower.name
+
+    @property
+    def depth(self) -> int:
+        return self._lower.depth
+
+
+class CacheHierarchy(object):
+    '''Chain of caches from the first level (closest to the processor) to the
+    last level cache, which is backed by the external memory. Every level is
+    the external memory of the level above it. Supported inclusion policies :
+    non-inclusive - every level allocates the lines it misses on, evictions
+                    from one level do not affect the others.
+    inclusive     - lines held by a level are also held by all the levels below
+                    it. Write misses read the line through the level below first
+                    and lines evicted from a level are back-invalidated from
+                    all the levels above, writing back the most recent dirty copy.
+    exclusive     - a line is held by at most one level. Read and write misses
+                    move the line up and out of the level below and lines evicted from a level are
+                    placed in the level below, which acts as a victim cache.
+                    All levels but the last must be write back caches.
+    All levels use the LRU replacement policy and the same line size. The
+    miss penalty of a level is the average access time of the level below
+    '''
+    def __init__(self, level_params : list, extern_memory : Memory,
+                 inclusion : str = 'non-inclusive', line_size : int = 4) -> None:
+
+        if inclusion not in INCLUSION_POLICIES:
+            raise ValueError(f'Valid inclusion policies are {", ".join(INCLUSION_POLICIES)}')
+        if not level_params:
+            raise ValueError('A cache hierarchy needs at least one cache level')
+        if(inclusion == 'exclusive' and
+           any(params['cache_wr_policy'] != 'wb' for params in level_params[:-1])):
+            raise ValueError('All levels but the last level of an exclusive hierarchy \
+                    must be write back ("wb") caches')
+
+        self._inclusion     = inclusion
+        self._extern_memory = extern_memory
+        self._levels        = []
+        # Lines back-invalidated from each level
+        self._back_invalidations = [0] * len(level_params)
+
+        # Links between the levels of an exclusive hierarchy, None for the
+        # last level which is backed by the external memory
+        links = []
+        # Build the levels from the last level cache up
+        lower = extern_memory
+        for params in reversed(level_params):
+            link = None
+            if inclusion == 'exclusive' and isinstance(lower, Cache):
+                lower = link = _ExclusiveLink(lower, extern_memory)
+            links.insert(0, link)
+            cache = Cache(params['cache_name'], params['cache_size'],
+                          params['cache_assoc'], params['cache_wr_policy'], lower,
+                          OrderedLRU(params['cache_size'], params['cache_assoc'], line_size),
+                          line_size, hit_latency=params.get('hit_latency', 1))
+            self._levels.insert(0, cache)
+            lower = cache
+
+        # Write misses on multi-word lines already read the line through the
+        # level below, single word lines need a write fill listener for that
+        write_fill = line_size == 4
+        last_level = len(self._levels) - 1
+        for level_idx, cache in enumerate(self._levels):
+            if inclusion == 'inclusive':
+                if level_idx > 0:
+                    cache.set_eviction_listener(partial(self._back_invalidate, level_idx))
+                if level_idx < last_level and write_fill:
+                    cache.set_write_fill_listener(self._levels[level_idx + 1].read_from_cache)
+            elif inclusion == 'exclusive' and level_idx < last_level:
+                cache.set_eviction_listener(partial(self._place_victim, level_idx))
+                if write_fill:
+                    # The written word is the whole line, so the line is taken
+                    # over dirty whatever its state in the level below
+                    cache.set_write_fill_listener(links[level_idx].memory_read_line)
+
+    def _back_invalidate(self, level_idx : int, address : int, words : list, dirty : int) -> tuple:
+        '''Eviction listener of the lower levels of an inclusive hierarchy.
+        The evicted line is invalidated in every level above and the most
+        recent dirty copy, the one closest to the processor, is written back'''
+        for upper_idx in range(level_idx - 1, -1, -1):
+            line = self._levels[upper_idx].invalidate_line(address)
+            if line is not None:
+                self._back_invalidations[upper_idx] += 1
+                if line[1]:
+                    words, dirty = line[0], True
+        return words, dirty
+
+    def _place_victim(self, level_idx : int, address : int, words : list, dirty : int) -> tuple:
+        '''Eviction listener of the upper levels of an exclusive hierarchy.
+        The evicted line is placed in the level below, keeping its dirty state,
+        and counted as bytes written by the evicting level'''
+        self._levels[level_idx + 1].write_line_to_cache(address, words, not dirty)
+        self._levels[level_idx].record_victim_write()
+        return words, False
+
+    def read(self, address : int) -> int:
+        '''Read through the first level cache'''
+        return self._levels[0].read_from_cache(address)
+
+    def write(self, address : int, data : int) -> None:
+        '''Write through the first level cache'''
+        self._levels[0].write_to_cache(address, data)
+
+    def run(self, cache_ops_inp : str) -> None:
+        '''Issue all the Read/Write instructions of an instruction file to
+        the first level cache'''
+        read_from_cache = self._levels[0].read_from_cache
+        write_to_cache  = self._levels[0].write_to_cache
+        for op, address, data in read_trace(cache_ops_inp):
+            if op == 'R':
+                read_from_cache(address)
+            else:
+                write_to_cache(address, data)
+
+    @property
+    def levels(self) -> list:
+        '''Returns the caches from the first to the last level'''
+        return list(self._levels)
+
+    def level_stats(self) -> list:
+        '''Returns one row of access counts per cache level'''
+        rows = []
+        for level_idx, cache in enumerate(self._levels):
+            reads, writes, hits, misses = cache.access_counts
+            bytes_read, bytes_written = cache.bytes_moved
+            timing = cache.timing()
+            rows.append({'level' : cache.name,
+                         'cache_size' : cache.size,
+                         'cache_assoc' : cache.associativity,
+                         'cache_wr_policy' : cache.write_policy,
+                         'cache_reads' : reads, 'cache_writes' : writes,
+                         'cache_hits' : hits, 'cache_misses' : misses,
+                         'hit_rate' : round(hits / reads, 6) if reads else 0.0,
+                         'back_invalidations' : self._back_invalidations[level_idx],
+                         'bytes_read' : bytes_read, 'bytes_written' : bytes_written,
+                         'hit_latency' : timing['hit_latency'],
+                         'amat' : round(timing['amat'], 4),
+                         'cycles' : round(timing['cycles'])})
+        return rows
+
+    def stats(self) -> None:
+        '''Print the per level cache statistics and the external memory
+        statistics'''
+        print(f'Cache hierarchy inclusion policy : {self._inclusion}')
+        print_sweep_table(self.level_stats(), HIERARCHY_COLUMNS)
+        print()
+        self._extern_memory.stats()
+
+def parse_level_params(levels : str) -> list:
+    '''Parse "name:size:associativity:write_policy[:hit_latency]" level
+    descriptions separated by commas, from the first to the last level'''
+    level_params = []
+    for level in levels.split(','):
+        name, size, assoc, wr_policy, *hit_latency = level.split(':')
+        level_params.append({'cache_name' : name, 'cache_size' : int(size, 0),
+                             'cache_assoc' : int(assoc, 0), 'cache_wr_policy' : wr_policy,
+                             'hit_latency' : int(hit_latency[0], 0) if hit_latency else 1})
+    return level_params
+
+def main():
+    parser = argparse.ArgumentParser(
+             description='Run a multi-level cache hierarchy simulation.')
+    parser.add_argument('--levels', '-l', default='L1:1024:2:wb,L2:4096:4:wb,L3:16384:8:wb', type=parse_level_params, help='Comma separated name:size:associativity:write_policy[:hit_latency] levels, first level first. example: L1:1024:2:wb:1,L2:8192:8:wb:10', metavar='levels', dest='levels')
+    parser.add_argument('--inclusion', '-inc', default='non-inclusive', type=str, choices=INCLUSION_POLICIES, help='The inclusion policy between the cache levels', metavar='inclusion', dest='inclusion')
+    parser.add_argument('--line_size', '-cls', default=4, type=int, help='The cache line size in bytes of all the levels. example: 64', metavar='line_size', dest='line_size')
+    parser.add_argument('--mem_latency', '-ml', default=100, type=int, help='Cycles the external memory takes to start a transfer. example: 100', metavar='mem_latency', dest='mem_latency')
+    parser.add_argument('--mem_bandwidth', '-mbw', default=8, type=int, help='Bytes the external memory transfers per cycle. example: 16', metavar='mem_bandwidth', dest='mem_bandwidth')
+    parser.add_argument('--mem_name', '-mn', default='M0', type=str, help='The external memory name. example: M0', metavar='mem_name', dest='mem_name')
+    parser.add_argument('--mem_size', '-ms', default=16384, type=int, help='The external memory size. example: 16384', metavar='mem_size', dest='mem_size')
+    parser.add_argument('--mem_sparse', '-msp', action='store_true', help='Model the external memory as a sparse paged memory.', dest='mem_sparse')
+    parser.add_argument('--ins_file', '-if', default='ins/default_ins.txt', type=str, help='File with sequence of instructions for cache simulator.', metavar='ins_file', dest='ins_file')
+
+    args = parser.parse_args()
+
+    if args.mem_sparse:
+        extern_memory = SparseMemory(args.mem_name, args.mem_size,
+                                     latency=args.mem_latency, bandwidth=args.mem_bandwidth)
+    else:
+        extern_memory = Memory(args.mem_name, args.mem_size,
+                               latency=args.mem_latency, bandwidth=args.mem_bandwidth)
+    hierarchy = CacheHierarchy(args.levels, extern_memory, args.inclusion, args.line_size)
+    hierarchy.run(args.ins_file)
+    hierarchy.stats()
+
+if __name__ == '__main__':
+    main()
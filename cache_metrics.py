@@ -0,0 +1,160 @@
+# Author / Maintainer : Rejoy Roy Mathews
+from array import array
+from contextlib import contextmanager
+import csv
+import json
+import time
+
+SET_COLUMNS    = ['set', 'hits', 'misses', 'evictions', 'dirty_writebacks']
+SAMPLE_COLUMNS = ['accesses', 'elapsed', 'cache_reads', 'cache_writes', 'cache_hits',
+                  'cache_misses', 'evictions', 'dirty_writebacks']
+
+class CacheMetrics(object):
+    '''Instrumentation of a cache.
+    Once attached with Cache.set_metrics, every demand access and eviction of
+    the cache is recorded in per-set hit, miss, eviction and dirty write-back
+    histograms. Every sample_interval demand accesses (0 disables sampling)
+    a snapshot of the cache counters is taken, so the behaviour of long runs
+    can be followed over time. Wall time is accumulated per named phase with
+    the phase context manager. Caches without metrics only pay for a None
+    check on their demand accesses
+    '''
+    def __init__(self, sets : int, sample_interval : int = 0) -> None:
+
+        if sets <= 0 or sample_interval < 0:
+            raise ValueError('Metrics need at least one cache set and a sample interval >= 0')
+
+        self._set_hits          = array('Q', [0]) * sets
+        self._set_misses        = array('Q', [0]) * sets
+        self._set_evictions     = array('Q', [0]) * sets
+        self._set_dirty_wbs     = array('Q', [0]) * sets
+        self._accesses          = 0
+        self._sample_interval   = sample_interval
+        self._next_sample       = sample_interval
+        self._samples           = []
+        # Phase name -> wall time in seconds, in the order phases first ran
+        self._phase_time        = {}
+        self._cache             = None
+        self._start             = time.perf_counter()
+
+    def attach(self, cache) -> None:
+        '''Cache whose counters are sampled, set by Cache.set_metrics'''
+        self._cache = cache
+
+    def record_access(self, set_idx : int, hit : bool) -> None:
+        '''Record a demand access to a cache set'''
+        if hit:
+            self._set_hits[set_idx] += 1
+        else:
+            self._set_misses[set_idx] += 1
+        self._accesses += 1
+        if self._accesses == self._next_sample:
+            self._next_sample += self._sample_interval
+            self.sample()
+
+    def record_eviction(self, set_idx : int, dirty : bool) -> None:
+        '''Record a line evicted from a cache set, dirty if it was written back'''
+        self._set_evictions[set_idx] += 1
+        if dirty:
+            self._set_dirty_wbs[set_idx] += 1
+
+    def sample(self) -> None:
+        '''Take a snapshot of the accesses, elapsed time and cache counters'''
+        reads, writes, hits, misses = self._cache.access_counts if self._cache else (0, 0, 0, 0)
+        self._samples.append({'accesses' : self._accesses,
+                              'elapsed' : round(time.perf_counter() - self._start, 6),
+                              'cache_reads' : reads, 'cache_writes' : writes,
+                              'cache_hits' : hits, 'cache_misses' : misses,
+                              'evictions' : sum(self._set_evictions),
+                              'dirty_writebacks' : sum(self._set_dirty_wbs)})
+
+    @contextmanager
+    def phase(self, name : str):
+        '''Context manager adding the wall time of its body to a phase'''
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_phase_time(name, time.perf_counter() - start)
+
+    def add_phase_time(self, name : str, elapsed : float) -> None:
+        '''Add wall time in seconds to a phase, for phases that interleave'''
+        self._phase_time[name] = self._phase_time.get(name, 0.0) + elapsed
+
+    def merge(self, state : dict) -> None:
+        '''Add the histograms and accesses of another copy of these metrics,
+        such as the output of to_dict of a parallel worker'''
+        for column, hist in (('hits', self._set_hits), ('misses', self._set_misses),
+                             ('evictions', self._set_evictions),
+                             ('dirty_writebacks', self._set_dirty_wbs)):
+            for set_idx, count in enumerate(state['sets'][column]):
+                hist[set_idx] += count
+        self._accesses += state['accesses']
+
+    @property
+    def accesses(self) -> int:
+        '''Number of demand accesses recorded'''
+        return self._accesses
+
+    @property
+    def phase_times(self) -> dict:
+        '''Returns the wall time in seconds of every phase'''
+        return dict(self._phase_time)
+
+    @property
+    def accesses_per_second(self) -> float:
+        '''Demand accesses per second of "simulate" phase wall time'''
+        elapsed = self._phase_time.get('simulate', 0.0)
+        return self._accesses / elapsed if elapsed else 0.0
+
+    def set_rows(self) -> list:
+        '''Returns one row of the per-set histograms per cache set'''
+        return [{'set' : set_idx, 'hits' : hits, 'misses' : misses,
+                 'evictions' : evictions, 'dirty_writebacks' : dirty_wbs}
+                for set_idx, (hits, misses, evictions, dirty_wbs) in
+                enumerate(zip(self._set_hits, self._set_misses,
+                              self._set_evictions, self._set_dirty_wbs))]
+
+    def to_dict(self) -> dict:
+        '''Returns all the metrics as a JSON serializable dict'''
+        return {'accesses' : self._accesses,
+                'accesses_per_second' : round(self.accesses_per_second, 3),
+                'dirty_writebacks' : sum(self._set_dirty_wbs),
+                'phase_times' : {name : round(elapsed, 6) for name, elapsed in self._phase_time.items()},
+                'sets' : {'hits' : self._set_hits.tolist(),
+                          'misses' : self._set_misses.tolist(),
+                          'evictions' : self._set_evictions.tolist(),
+                          'dirty_writebacks' : self._set_dirty_wbs.tolist()},
+                'samples' : list(self._samples)}
+
+    def write_json(self, out) -> None:
+        '''Write all the metrics as JSON to an open file'''
+        json.dump(self.to_dict(), out, indent=2)
+        out.write('\n')
+
+    def write_csv(self, out, table : str = 'sets') -> None:
+        '''Write the per-set histograms ("sets") or the interval samples
+        ("samples") as CSV to an open file'''
+        if table == 'sets':
+            rows, columns = self.set_rows(), SET_COLUMNS
+        elif table == 'samples':
+            rows, columns = self._samples, SAMPLE_COLUMNS
+        else:
+            raise ValueError('Metrics CSV tables are "sets" and "samples"')
+        writer = csv.DictWriter(out, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(rows)
+
+    def write(self, path : str) -> None:
+        '''Write the metrics to a ".json" file, or the per-set histograms to
+        a ".csv" file and the samples, if any, next to it in
+        "<name>_samples.csv"'''
+        if path.endswith('.csv'):
+            with open(path, 'w', newline='') as f:
+                self.write_csv(f)
+            if self._samples:
+                with open(path[:-len('.csv')] + '_samples.csv', 'w', newline='') as f:
+                    self.write_csv(f, 'samples')
+        else:
+            with open(path, 'w') as f:
+                self.write_json(f)
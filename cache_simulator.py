@@ -1,74 +1,234 @@
 #!/usr/bin/env python3
 # Author / Maintainer : Rejoy Roy Mathews
 from cache import Cache
-from LRU import LRU
-from Memory import Memory
+from replacement_policies import REPLACEMENT_POLICIES
+from prefetchers import PREFETCHERS
+from Memory import Memory, SparseMemory
+from trace_reader import read_trace
+from cache_metrics import CacheMetrics
+from checkpoint import save_checkpoint, load_checkpoint
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
 import argparse
+import sys
+import time
+
+# Write buffer size of dump files
+DUMP_BUFFER_SIZE = 1 << 20
 
 class cache_simulator(object):
     '''Cache simulator takes in a user cache configuration(name, size, 
-    associativity, write policy) & memory configuration(name, size)
+    associativity, write policy, line size) & memory configuration(name, size)
     and simulates cache and external memory accesses for the
     cache configuration.
-    The cache replacement policy used is the Least Recently Used(LRU)
-    replacement policy.
+    The cache replacement policy defaults to the Least Recently Used(LRU)
+    replacement policy. A prefetcher can optionally be attached to the cache.
+    With a metrics output file the cache is instrumented and the metrics,
+    including the wall time of the run phases, are
+    written to the file once the run completes. The final cache and memory
+    contents are only dumped when a dump file is given. Runs can start from
+    the cache and memory state saved in a checkpoint by an earlier run.
     '''
 
     def __init__(self, cache_sim_param : dict) -> None:
+        self._cache_sim_param = cache_sim_param
         # Replacement policy for the cache
-        self._r_policy      = LRU(cache_sim_param['cache_size'],
-                                  cache_sim_param['cache_assoc'])
-        # Memory the cache interfaces with
-        self._extern_memory = Memory(cache_sim_param['mem_name'],
-                            cache_sim_param['mem_size'])
+        self._r_policy      = REPLACEMENT_POLICIES[cache_sim_param.get('replacement_policy', 'lru')](
+                                  cache_sim_param['cache_size'],
+                                  cache_sim_param['cache_assoc'],
+                                  cache_sim_param.get('cache_line_size', 4))
+        # Memory the cache interfaces with. A sparse memory only allocates
+        # the pages that are written to
+        if cache_sim_param.get('mem_sparse'):
+            self._extern_memory = SparseMemory(cache_sim_param['mem_name'],
+                                cache_sim_param['mem_size'],
+                                latency=cache_sim_param.get('mem_latency', 100),
+                                bandwidth=cache_sim_param.get('mem_bandwidth', 8))
+        else:
+            self._extern_memory = Memory(cache_sim_param['mem_name'],
+                                cache_sim_param['mem_size'],
+                                latency=cache_sim_param.get('mem_latency', 100),
+                                bandwidth=cache_sim_param.get('mem_bandwidth', 8))
+        # Optional prefetcher for the cache
+        self._prefetcher    = None
+        if cache_sim_param.get('prefetcher'):
+            self._prefetcher = PREFETCHERS[cache_sim_param['prefetcher']](
+                                cache_sim_param.get('cache_line_size', 4),
+                                cache_sim_param.get('prefetch_degree', 1),
+                                cache_sim_param.get('prefetch_latency', 0))
         # Cache to simulate
         self._cache         = Cache(cache_sim_param['cache_name'],
                             cache_sim_param['cache_size'],
                             cache_sim_param['cache_assoc'],
                             cache_sim_param['cache_wr_policy'],
                             self._extern_memory,
-                            self._r_policy)
+                            self._r_policy,
+                            cache_sim_param.get('cache_line_size', 4),
+                            self._prefetcher,
+                            cache_sim_param.get('hit_latency', 1),
+                            cache_sim_param.get('miss_penalty'))
+        # Optional instrumentation of the cache
+        self._metrics       = None
+        if cache_sim_param.get('metrics_out'):
+            self._metrics = CacheMetrics(self._cache.sets,
+                                cache_sim_param.get('sample_interval', 0))
+            self._cache.set_metrics(self._metrics)
+        # Start from a warmed up cache and memory
+        if cache_sim_param.get('checkpoint_in'):
+            load_checkpoint(cache_sim_param['checkpoint_in'], self._cache, self._extern_memory)
 
 
-    def run(self, cache_ops_inp) ->  None:
+    def run(self, cache_ops_inp, workers : int = 1) ->  None:
         '''
-        Implement all the Read/Write instructions provided in the instruction file
+        Implement all the Read/Write instructions provided in the instruction file.
+        With more than one worker the cache sets are simulated in parallel
         '''
-        with open(cache_ops_inp, 'r') as f:
-            # Extract all the instructions
-            cache_ops = [line.split() for line in f]
-
-        # Issue read/write instructions to cache
-        for ins in range(len(cache_ops)):
-            if cache_ops[ins][0] == 'R':
-                self._cache.read_from_cache(int(cache_ops[ins][1],0))
-            elif cache_ops[ins][0] == 'W':
-                self._cache.write_to_cache(int(cache_ops[ins][1],0), int(cache_ops[ins][2],0))
-            else:
-                raise ValueError('Specify "R" for read operations or  \
-                                "W" for write operations as the opcode for the operation')
+        if workers > 1:
+            if self._prefetcher is not None:
+                raise ValueError('Prefetches cross cache set boundaries, simulations with a prefetcher \
+                        can not be split over workers')
+            if self._cache_sim_param.get('sample_interval'):
+                raise ValueError('Metrics samples follow the instruction order, sampled simulations \
+                        can not be split over workers')
+            self._run_parallel(cache_ops_inp, workers)
+        elif self._metrics is not None:
+            self._run_timed(cache_ops_inp)
+        else:
+            for op, address, data in read_trace(cache_ops_inp):
+                if op == 'R':
+                    self._cache.read_from_cache(address)
+                else:
+                    self._cache.write_to_cache(address, data)
 
 
+        if self._cache_sim_param.get('checkpoint_out'):
+            save_checkpoint(self._cache_sim_param['checkpoint_out'], self._cache, self._extern_memory)
         self._stats() # Dump post completion statistics
-        self._cache_dump() # Dump post completion cache state
-        self._extern_memory_dump() # Dump post completion memory state
+        if self._cache_sim_param.get('dump_file'):
+            with self._phase('dump'):
+                self._dump(self._cache_sim_param['dump_file']) # Dump post completion cache and memory state
+        if self._metrics is not None:
+            self._metrics.write(self._cache_sim_param['metrics_out'])
+
+    def _phase(self, name : str):
+        '''Times a phase of the run when the cache is instrumented'''
+        if self._metrics is None:
+            return nullcontext()
+        return self._metrics.phase(name)
+
+    def _run_timed(self, cache_ops_inp) -> None:
+        '''
+        Serial run of an instrumented cache. Instructions are still parsed
+        one line at a time as they are issued to the cache, the time spent
+        reading each instruction and the time spent simulating it are added
+        to the parse and simulate phases
+        '''
+        read_from_cache = self._cache.read_from_cache
+        write_to_cache  = self._cache.write_to_cache
+        parse_time = simulate_time = 0.0
+        last = time.perf_counter()
+        for op, address, data in read_trace(cache_ops_inp):
+            parsed = time.perf_counter()
+            parse_time += parsed - last
+            if op == 'R':
+                read_from_cache(address)
+            else:
+                write_to_cache(address, data)
+            last = time.perf_counter()
+            simulate_time += last - parsed
+        # Reading past the last instruction
+        parse_time += time.perf_counter() - last
+        self._metrics.add_phase_time('parse', parse_time)
+        self._metrics.add_phase_time('simulate', simulate_time)
 
+    def _run_parallel(self, cache_ops_inp, workers : int) -> None:
+        '''
+        Cache sets never share entries or external memory addresses, so the
+        instructions are partitioned into contiguous ranges of cache sets and
+        each range is simulated by a separate process. The per range cache
+        state, external memory contents and access counts are then merged,
+        giving the same result as issuing all the instructions in order
+        '''
+        cache_sets = self._cache.sets
+        sets_per_worker = -(-cache_sets // min(workers, cache_sets))
+        set_ranges = [(first_set, min(first_set + sets_per_worker, cache_sets))
+                      for first_set in range(0, cache_sets, sets_per_worker)]
+        # Instructions of each set range as op (1 for writes), address and data
+        partitions = [(array('B'), array('Q'), array('Q')) for _ in set_ranges]
+        set_index = self._cache.set_index
+        with self._phase('parse'):
+            for op, address, data in read_trace(cache_ops_inp):
+                ops, addrs, wr_data = partitions[set_index(address) // sets_per_worker]
+                ops.append(op == 'W')
+                addrs.append(address)
+                wr_data.append(data or 0)
 
-    def _extern_memory_dump(self) -> None:
-        '''Print the contents of the external memory'''
-        print(self._extern_memory)
+        with self._phase('simulate'), ProcessPoolExecutor(max_workers=len(set_ranges)) as pool:
+            results = [pool.submit(_simulate_set_range, self._cache_sim_param,
+                                   first_set, last_set, *partition)
+                       for (first_set, last_set), partition in zip(set_ranges, partitions)]
+            for (first_set, last_set), result in zip(set_ranges, results):
+                cache_state, mem_contents, (mem_reads, mem_writes), metrics = result.result()
+                self._cache.merge_set_range_state(first_set, last_set, cache_state)
+                self._extern_memory.memory_load(mem_contents)
+                self._extern_memory.add_access_counts(mem_reads, mem_writes)
+                if metrics is not None:
+                    self._metrics.merge(metrics)
 
-    def _cache_dump(self) -> None:
-        '''Print the contents of the cache'''
-        print(self._cache)
+    def _dump(self, dump_file : str) -> None:
+        '''Write the contents of the cache followed by the contents of the
+        external memory to a file, "-" writes to stdout. Text dumps optionally
+        list only the valid or dirty cache entries and the written memory
+        addresses, binary dumps always leave out memory addresses that were
+        never written'''
+        binary     = self._cache_sim_param.get('dump_format', 'text') == 'binary'
+        valid_only = self._cache_sim_param.get('dump_valid_only', False)
+        dirty_only = self._cache_sim_param.get('dump_dirty_only', False)
+        if dump_file == '-':
+            sys.stdout.flush()
+            out = open(sys.stdout.fileno(), 'wb' if binary else 'w',
+                       buffering=DUMP_BUFFER_SIZE, closefd=False)
+        else:
+            out = open(dump_file, 'wb' if binary else 'w', buffering=DUMP_BUFFER_SIZE)
+        with out:
+            if binary:
+                self._cache.dump_binary(out, valid_only, dirty_only)
+                self._extern_memory.dump_binary(out)
+            else:
+                self._cache.dump(out, valid_only, dirty_only)
+                out.write('\n')
+                self._extern_memory.dump(out, valid_only or dirty_only)
+                out.write('\n')
 
     def _stats(self) -> None:
         '''
         Print the cache hits, cache misses, cache reads, cache writes
-        memory reads and memory write statistics
+        memory reads and memory write statistics followed by the timing model
+        results
         '''
         self._cache.stats()
         self._extern_memory.stats()
+        self._cache.timing_stats()
+
+def _simulate_set_range(cache_sim_param : dict, first_set : int, last_set : int,
+                        ops : array, addrs : array, data : array) -> tuple:
+    '''
+    Process pool worker for cache_simulator._run_parallel. Issues the
+    instructions of cache sets first_set to last_set - 1 to a fresh cache
+    backed by a sparse external memory and returns the cache set range
+    state, the external memory contents written to addresses of the set
+    range, the external memory (reads, writes) counts and the cache metrics,
+    if instrumented
+    '''
+    cache_sim = cache_simulator(dict(cache_sim_param, mem_sparse=True))
+    cache_sim._cache.access_batch(ops, addrs, data)
+    set_index = cache_sim._cache.set_index
+    return (cache_sim._cache.set_range_state(first_set, last_set),
+            [(addr, data) for addr, data in cache_sim._extern_memory.written_items()
+             if first_set <= set_index(addr) < last_set],
+            cache_sim._extern_memory.access_counts,
+            cache_sim._metrics.to_dict() if cache_sim._metrics is not None else None)
 
 def main():
     parser = argparse.ArgumentParser(            
@@ -78,19 +238,66 @@ def main():
     parser.add_argument('--cache_assoc', '-ca', default=4, type=int,help='The cache associativity. example: 4', metavar='cache_associativity', dest='cache_assoc')
     parser.add_argument('--cache_wr_policy', '-cwp', default='wb', type=str, choices = ['wb','wt'], help='The cache write policy. write back or write through', 
                         metavar='cache_write_policy', dest='cache_wr_policy')
+    parser.add_argument('--replacement_policy', '-rp', default='lru', type=str, choices=list(REPLACEMENT_POLICIES), help='The cache replacement policy. example: tree_plru', metavar='replacement_policy', dest='replacement_policy')
+    parser.add_argument('--cache_line_size', '-cls', default=4, type=int, help='The cache line size in bytes. example: 64', metavar='cache_line_size', dest='cache_line_size')
+    parser.add_argument('--prefetcher', '-pf', default=None, type=str, choices=list(PREFETCHERS), help='Prefetcher attached to the cache. example: stride', metavar='prefetcher', dest='prefetcher')
+    parser.add_argument('--prefetch_degree', '-pfd', default=1, type=int, help='Lines prefetched per prefetch trigger. example: 2', metavar='prefetch_degree', dest='prefetch_degree')
+    parser.add_argument('--prefetch_latency', '-pfl', default=0, type=int, help='Cache accesses a prefetch takes to fill its line. example: 4', metavar='prefetch_latency', dest='prefetch_latency')
+    parser.add_argument('--hit_latency', '-hl', default=1, type=int, help='Cycles a cache hit takes. example: 2', metavar='hit_latency', dest='hit_latency')
+    parser.add_argument('--miss_penalty', '-mp', default=None, type=int, help='Cycles a cache miss adds, defaults to the memory latency plus the line transfer time. example: 50', metavar='miss_penalty', dest='miss_penalty')
+    parser.add_argument('--mem_latency', '-ml', default=100, type=int, help='Cycles the external memory takes to start a transfer. example: 100', metavar='mem_latency', dest='mem_latency')
+    parser.add_argument('--mem_bandwidth', '-mbw', default=8, type=int, help='Bytes the external memory transfers per cycle. example: 16', metavar='mem_bandwidth', dest='mem_bandwidth')
     parser.add_argument('--mem_name', '-mn', default='M0', type=str, help='The external memory name. example: M0', metavar='mem_name', dest='mem_name')
     parser.add_argument('--mem_size', '-ms', default=16384, type=int, help='The external memory size. example: 16384', metavar='mem_size', dest='mem_size')
-    parser.add_argument('--ins_file', '-if', type=str, help='File with sequence of instructions for cache simulator.', metavar='ins_file', dest='ins_file')
+    parser.add_argument('--mem_sparse', '-msp', action='store_true', help='Model the external memory as a sparse paged memory. Only written pages are allocated and dumped.',
+                        dest='mem_sparse')
+    parser.add_argument('--workers', '-j', default=1, type=int, help='Number of processes simulating disjoint ranges of cache sets in parallel. example: 4', metavar='workers', dest='workers')
+    parser.add_argument('--metrics_out', '-mo', type=str, help='Instrument the cache and write per-set histograms, phase wall times and samples to a ".json" file, or the per-set histograms to a ".csv" file.', metavar='metrics_out', dest='metrics_out')
+    parser.add_argument('--sample_interval', '-si', default=0, type=int, help='Sample the cache counters every sample_interval accesses, requires --metrics_out. example: 10000', metavar='sample_interval', dest='sample_interval')
+    parser.add_argument('--dump_file', '-df', type=str, help='Write the final cache and memory contents to this file, "-" writes to stdout.', metavar='dump_file', dest='dump_file')
+    parser.add_argument('--dump_format', '-dfmt', default='text', type=str, choices=['text', 'binary'], help='The dump file format, text or a compact binary snapshot', metavar='dump_format', dest='dump_format')
+    parser.add_argument('--dump_valid_only', '-dvo', action='store_true', help='Only dump the valid cache entries and the written memory addresses.', dest='dump_valid_only')
+    parser.add_argument('--dump_dirty_only', '-ddo', action='store_true', help='Only dump the dirty cache entries and the written memory addresses.', dest='dump_dirty_only')
+    parser.add_argument('--checkpoint_in', '-cki', type=str, help='Restore the cache and memory state from a checkpoint before the run. example: warm.ckpt', metavar='checkpoint_in', dest='checkpoint_in')
+    parser.add_argument('--checkpoint_out', '-cko', type=str, help='Save the cache and memory state to a checkpoint after the run. example: warm.ckpt', metavar='checkpoint_out', dest='checkpoint_out')
+    parser.add_argument('--ins_file', '-if', type=str, help='File with sequence of instructions for cache simulator. ".gz"/".xz" files are decompressed, "-" reads stdin.', metavar='ins_file', dest='ins_file')
 
     args = parser.parse_args()
 
+    if args.workers > 1:
+        # Parallel runs split the cache sets over workers, see cache_simulator.run
+        if args.prefetcher:
+            parser.error('prefetches cross cache set boundaries, --prefetcher can not be used '
+                         'with more than one worker')
+        if args.sample_interval:
+            parser.error('metrics samples follow the instruction order, --sample_interval can '
+                         'not be used with more than one worker')
+
     cache_sim_params = {}
     cache_sim_params['cache_name'] = args.cache_name
     cache_sim_params['cache_size'] = args.cache_size
     cache_sim_params['cache_assoc'] = args.cache_assoc
     cache_sim_params['cache_wr_policy'] = args.cache_wr_policy
+    cache_sim_params['cache_line_size'] = args.cache_line_size
+    cache_sim_params['replacement_policy'] = args.replacement_policy
+    cache_sim_params['prefetcher'] = args.prefetcher
+    cache_sim_params['prefetch_degree'] = args.prefetch_degree
+    cache_sim_params['prefetch_latency'] = args.prefetch_latency
+    cache_sim_params['hit_latency'] = args.hit_latency
+    cache_sim_params['miss_penalty'] = args.miss_penalty
+    cache_sim_params['mem_latency'] = args.mem_latency
+    cache_sim_params['mem_bandwidth'] = args.mem_bandwidth
     cache_sim_params['mem_name'] = args.mem_name
     cache_sim_params['mem_size'] = args.mem_size
+    cache_sim_params['mem_sparse'] = args.mem_sparse
+    cache_sim_params['metrics_out'] = args.metrics_out
+    cache_sim_params['dump_file'] = args.dump_file
+    cache_sim_params['checkpoint_in'] = args.checkpoint_in
+    cache_sim_params['checkpoint_out'] = args.checkpoint_out
+    cache_sim_params['dump_format'] = args.dump_format
+    cache_sim_params['dump_valid_only'] = args.dump_valid_only
+    cache_sim_params['dump_dirty_only'] = args.dump_dirty_only
+    cache_sim_params['sample_interval'] = args.sample_interval
     cache_sim = cache_simulator(cache_sim_params)
 
     if args.ins_file:
@@ -98,7 +305,7 @@ def main():
     else:
         cache_ops = 'ins/default_ins.txt'
 
-    cache_sim.run(cache_ops)
+    cache_sim.run(cache_ops, args.workers)
 
 if __name__ == '__main__':
     main()
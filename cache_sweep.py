@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# Author / Maintainer : Rejoy Roy Mathews
+from cache import Cache
+from replacement_policies import REPLACEMENT_POLICIES
+from Memory import SparseMemory
+from trace_reader import read_trace
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import csv
+import itertools
+import sys
+
+SWEEP_COLUMNS = ['cache_size', 'cache_assoc', 'cache_wr_policy', 'cache_line_size', 'replacement_policy',
+                 'cache_reads', 'cache_writes', 'cache_hits', 'cache_misses',
+                 'hit_rate', 'mem_reads', 'mem_writes', 'bytes_read', 'bytes_written']
+
+# Trace shared by the configurations simulated in a sweep worker process
+_sweep_trace = None
+
+def load_trace_arrays(cache_ops_inp : str) -> tuple:
+    '''Parse an instruction file once into op (1 for writes), address and
+    data arrays that can be replayed with Cache.access_batch'''
+    ops, addrs, data = array('B'), array('Q'), array('Q')
+    for op, address, wr_data in read_trace(cache_ops_inp):
+        ops.append(op == 'W')
+        addrs.append(address)
+        data.append(wr_data or 0)
+    return ops, addrs, data
+
+def simulate_config(trace : tuple, cache_size : int, cache_assoc : int,
+                    cache_wr_policy : str, mem_size : int, cache_line_size : int = 4,
+                    replacement_policy : str = 'lru') -> dict:
+    '''Replay a parsed trace on one cache configuration and return a row of
+    the sweep table'''
+    memory = SparseMemory('M0', mem_size)
+    cache  = Cache('C0', cache_size, cache_assoc, cache_wr_policy, memory,
+                   REPLACEMENT_POLICIES[replacement_policy](cache_size, cache_assoc, cache_line_size),
+                   cache_line_size)
+    cache.access_batch(*trace)
+    reads, writes, hits, misses = cache.access_counts
+    mem_reads, mem_writes = memory.access_counts
+    bytes_read, bytes_written = cache.bytes_moved
+    return {'cache_size' : cache_size, 'cache_assoc' : cache_assoc,
+            'cache_wr_policy' : cache_wr_policy, 'cache_line_size' : cache_line_size,
+            'replacement_policy' : replacement_policy,
+            'cache_reads' : reads, 'cache_writes' : writes,
+            'cache_hits' : hits, 'cache_misses' : misses,
+            'hit_rate' : round(hits / reads, 6) if reads else 0.0,
+            'mem_reads' : mem_reads, 'mem_writes' : mem_writes,
+            'bytes_read' : bytes_read, 'bytes_written' : bytes_written}
+
+def _init_sweep_worker(trace : tuple) -> None:
+    '''Process pool initializer, receives the parsed trace once per worker'''
+    global _sweep_trace
+    _sweep_trace = trace
+
+def _simulate_config_worker(config : tuple) -> dict:
+    '''Process pool task, simulates one configuration on the worker trace'''
+    return simulate_config(_sweep_trace, *config)
+
+def sweep(cache_ops_inp : str, cache_sizes : list, cache_assocs : list,
+          cache_wr_policies : list, mem_size : int, workers : int = 1,
+          cache_line_sizes : list = (4,), replacement_policies : list = ('lru',)) -> list:
+    '''Simulate every cache size x associativity x write policy x line size x
+    replacement policy combination on an instruction file that is parsed only
+    once. Returns one row per configuration in grid order. Combinations with
+    fewer lines than the associativity are skipped'''
+    trace = load_trace_arrays(cache_ops_inp)
+    configs = [(size, assoc, policy, mem_size, line_size, r_policy)
+               for size, assoc, policy, line_size, r_policy in
+               itertools.product(cache_sizes, cache_assocs, cache_wr_policies,
+                                 cache_line_sizes, replacement_policies)
+               if size // line_size >= assoc]
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_sweep_worker,
+                                 initargs=(trace,)) as pool:
+            return list(pool.map(_simulate_config_worker, configs))
+    return [simulate_config(trace, *config) for config in configs]
+
+def write_sweep_csv(rows : list, out, columns : list = SWEEP_COLUMNS) -> None:
+    '''Write the sweep table as CSV to an open file'''
+    writer = csv.DictWriter(out, fieldnames=columns)
+    writer.writeheader()
+    writer.writerows(rows)
+
+def print_sweep_table(rows : list, columns : list = SWEEP_COLUMNS) -> None:
+    '''Print the sweep table with aligned columns'''
+    widths = [max([len(col)] + [len(str(row[col])) for row in rows]) for col in columns]
+    print('  '.join(col.rjust(w) for col, w in zip(columns, widths)))
+    for row in rows:
+        print('  '.join(str(row[col]).rjust(w) for col, w in zip(columns, widths)))
+
+def int_list(arg : str) -> list:
+    '''Parse a comma separated list of integers, such as an argparse option
+    value "1024,4096" or "0x400,0x1000"'''
+    return [int(x, 0) for x in arg.split(',')]
+
+def main():
+    parser = argparse.ArgumentParser(
+             description='Sweep cache configurations over one instruction file.')
+    parser.add_argument('--cache_sizes', '-cs', default='1024,4096,16384', type=int_list, help='Comma separated cache sizes. example: 1024,4096', metavar='cache_sizes', dest='cache_sizes')
+    parser.add_argument('--cache_assocs', '-ca', default='1,2,4,8,16', type=int_list, help='Comma separated cache associativities. example: 1,4,16', metavar='cache_assocs', dest='cache_assocs')
+    parser.add_argument('--cache_wr_policies', '-cwp', default='wb,wt', type=lambda arg: arg.split(','), help='Comma separated cache write policies. example: wb,wt', metavar='cache_wr_policies', dest='cache_wr_policies')
+    parser.add_argument('--cache_line_sizes', '-cls', default='4', type=int_list, help='Comma separated cache line sizes in bytes. example: 16,64,256', metavar='cache_line_sizes', dest='cache_line_sizes')
+    parser.add_argument('--replacement_policies', '-rp', default='lru', type=lambda arg: arg.split(','), help=f'Comma separated replacement policies out of {",".join(REPLACEMENT_POLICIES)}. example: lru,tree_plru', metavar='replacement_policies', dest='replacement_policies')
+    parser.add_argument('--mem_size', '-ms', default=16384, type=int, help='The external memory size. example: 16384', metavar='mem_size', dest='mem_size')
+    parser.add_argument('--workers', '-j', default=1, type=int, help='Number of processes simulating configurations in parallel. example: 4', metavar='workers', dest='workers')
+    parser.add_argument('--out_file', '-of', type=str, help='Write the results as CSV to this file instead of printing a table.', metavar='out_file', dest='out_file')
+    parser.add_argument('--ins_file', '-if', default='mem_ins_auto_gen/autogen_ins.txt', type=str, help='File with sequence of instructions for cache simulator.', metavar='ins_file', dest='ins_file')
+
+    args = parser.parse_args()
+
+    for wr_policy in args.cache_wr_policies:
+        if wr_policy not in ('wb', 'wt'):
+            parser.error(f'invalid cache write policy {wr_policy}, valid write policies are wb, wt')
+    for r_policy in args.replacement_policies:
+        if r_policy not in REPLACEMENT_POLICIES:
+            parser.error(f'invalid replacement policy {r_policy}, valid replacement policies are '
+                         f'{", ".join(REPLACEMENT_POLICIES)}')
+
+    rows = sweep(args.ins_file, args.cache_sizes, args.cache_assocs,
+                 args.cache_wr_policies, args.mem_size, args.workers, args.cache_line_sizes,
+                 args.replacement_policies)
+    if args.out_file == '-':
+        write_sweep_csv(rows, sys.stdout)
+    elif args.out_file:
+        with open(args.out_file, 'w', newline='') as f:
+            write_sweep_csv(rows, f)
+    else:
+        print_sweep_table(rows)
+
+if __name__ == '__main__':
+    main()
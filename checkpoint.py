@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# Author / Maintainer : Rejoy Roy Mathews
+from array import array
+import argparse
+import json
+import mmap
+import struct
+import sys
+
+# Checkpoint files start with this magic followed by sections. Every section
+# header holds the length of its name, the section kind, the array typecode
+# (for array sections) and the payload length, followed by the name and the
+# payload padded to 8 Bytes. Arrays and byte arrays are stored raw in the
+# byte order recorded in the "config" section, the config is stored as JSON
+CHECKPOINT_MAGIC   = b'CSIMCKP2'
+CHECKPOINT_SECTION = struct.Struct('<HBcQ')
+_SECTION_BYTES = 0
+_SECTION_ARRAY = 1
+_SECTION_JSON  = 2
+
+def _cache_config(cache) -> dict:
+    '''Cache parameters a checkpoint can only be restored into'''
+    return {'size' : cache.size, 'associativity' : cache.associativity,
+            'line_size' : cache.line_size, 'write_policy' : cache.write_policy,
+            'replacement_policy' : type(cache._replacement_policy).__name__}
+
+def _policy_sections(state) -> tuple:
+    '''Returns the layout of a replacement policy state and the state as
+    arrays and byte arrays by section name. States are arrays or byte arrays
+    ("value"), lists of integers ("list") or tuples of arrays and byte arrays
+    ("tuple")'''
+    if isinstance(state, (array, bytes, bytearray)):
+        return 'value', {'state' : state}
+    if isinstance(state, list):
+        return 'list', {'state' : array('q', state)}
+    if isinstance(state, tuple) and all(isinstance(part, (array, bytes, bytearray)) for part in state):
+        return 'tuple', {str(part_idx) : part for part_idx, part in enumerate(state)}
+    raise ValueError(f'Replacement policy state of type {type(state).__name__} can not be checkpointed')
+
+def _policy_state(layout : str, sections : dict):
+    '''Returns the replacement policy state stored by _policy_sections'''
+    if layout == 'value':
+        return sections['state']
+    if layout == 'list':
+        return sections['state'].tolist()
+    if layout == 'tuple':
+        return tuple(sections[str(part_idx)] for part_idx in range(len(sections)))
+    raise ValueError(f'Unknown replacement policy state layout {layout}')
+
+def _write_section(out, name : str, value) -> None:
+    if isinstance(value, array):
+        kind, typecode, payload = _SECTION_ARRAY, value.typecode.encode(), memoryview(value).cast('B')
+    elif isinstance(value, (bytes, bytearray)):
+        kind, typecode, payload = _SECTION_BYTES, b' ', value
+    else:
+        kind, typecode, payload = _SECTION_JSON, b' ', json.dumps(value).encode()
+    name = name.encode()
+    out.write(CHECKPOINT_SECTION.pack(len(name), kind, typecode, len(payload)))
+    out.write(name)
+    out.write(payload)
+    out.write(bytes(-len(payload) % 8))
+
+def save_checkpoint(path : str, cache, memory) -> None:
+    '''Save the state of a cache (entries, data and replacement policy state)
+    and of its external memory (addresses holding integer data) to a
+    checkpoint file. Access counters, pending prefetches and prefetcher
+    tables are not saved'''
+    cache_state = cache.checkpoint_state()
+    layout, policy_sections = _policy_sections(cache_state.pop('r_policy'))
+    sections = {'config' : {'byteorder' : sys.byteorder, 'cache' : _cache_config(cache),
+                            'r_policy_layout' : layout, 'memory_depth' : memory.depth}}
+    for key, value in cache_state.items():
+        sections['cache.' + key] = value
+    for key, value in policy_sections.items():
+        sections['r_policy.' + key] = value
+    for key, value in memory.checkpoint_state().items():
+        sections['memory.' + key] = value
+    with open(path, 'wb') as out:
+        out.write(CHECKPOINT_MAGIC)
+        for name, value in sections.items():
+            _write_section(out, name, value)
+
+def read_checkpoint(path : str) -> dict:
+    '''Returns the sections of a checkpoint file by name. The file is
+    memory-mapped and array payloads are copied out of the mapping in bulk'''
+    sections = {}
+    with open(path, 'rb') as f, \
+         mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if mm[:len(CHECKPOINT_MAGIC)] != CHECKPOINT_MAGIC:
+            raise ValueError(f'{path} is not a checkpoint file')
+        view = memoryview(mm)
+        try:
+            offset = len(CHECKPOINT_MAGIC)
+            while offset < len(mm):
+                if offset + CHECKPOINT_SECTION.size > len(mm):
+                    raise ValueError(f'{path} : truncated checkpoint section')
+                name_len, kind, typecode, length = CHECKPOINT_SECTION.unpack_from(mm, offset)
+                offset += CHECKPOINT_SECTION.size
+                name = bytes(view[offset:offset + name_len]).decode()
+                offset += name_len
+                if offset + length > len(mm):
+                    raise ValueError(f'{path} : truncated checkpoint section {name}')
+                payload = view[offset:offset + length]
+                if kind == _SECTION_ARRAY:
+                    value = array(typecode.decode())
+                    value.frombytes(payload)
+                elif kind == _SECTION_BYTES:
+                    value = bytearray(payload)
+                elif kind == _SECTION_JSON:
+                    value = json.loads(bytes(payload))
+                else:
+                    payload.release()
+                    raise ValueError(f'{path} : unknown kind {kind} of checkpoint section {name}')
+                payload.release()
+                sections[name] = value
+                offset += length + (-length % 8)
+        finally:
+            # Drop the view on the mapping so it can be closed
+            view.release()
+    if 'config' not in sections:
+        raise ValueError(f'{path} : checkpoint without a config section')
+    if sections['config']['byteorder'] != sys.byteorder:
+        for value in sections.values():
+            if isinstance(value, array):
+                value.byteswap()
+    return sections
+
+def load_checkpoint(path : str, cache, memory) -> None:
+    '''Restore a cache and its external memory from a checkpoint file. The
+    cache must have the parameters of the checkpointed cache, the access
+    counters of the cache and memory are left as they are'''
+    sections = read_checkpoint(path)
+    config = sections['config']['cache']
+    if config != _cache_config(cache):
+        raise ValueError(f'{path} : checkpoint of a {config} cache can not be restored into a '
+                         f'{_cache_config(cache)} cache')
+    memory_depth = sections['config']['memory_depth']
+    if memory_depth != memory.depth:
+        raise ValueError(f'{path} : checkpoint of a memory of depth {memory_depth} can not be '
+                         f'restored into a memory of depth {memory.depth}')
+    cache_state = {key[len('cache.'):] : value for key, value in sections.items()
+                   if key.startswith('cache.')}
+    cache_state['r_policy'] = _policy_state(sections['config']['r_policy_layout'],
+                                            {key[len('r_policy.'):] : value
+                                             for key, value in sections.items()
+                                             if key.startswith('r_policy.')})
+    cache.restore_state(cache_state)
+    memory.restore_state({key[len('memory.'):] : value for key, value in sections.items()
+                          if key.startswith('memory.')})
+
+def main():
+    parser = argparse.ArgumentParser(
+             description='Describe the contents of a cache simulator checkpoint.')
+    parser.add_argument('--checkpoint', '-ck', type=str, required=True, help='The checkpoint file. example: warm.ckpt', metavar='checkpoint', dest='checkpoint')
+
+    args = parser.parse_args()
+
+    sections = read_checkpoint(args.checkpoint)
+    config = sections['config']
+    print(f'Checkpoint {args.checkpoint} : {config["cache"]}, memory depth {config["memory_depth"]}')
+    print(f'Valid cache entries : {sum(sections["cache.set_valid_ct"])}')
+    print(f'Memory words : {len(sections["memory.addrs"])}')
+
+if __name__ == '__main__':
+    main()
@@ -1,21 +1,14 @@
-
 #!/usr/bin/env python3
 # Author / Maintainer : Rejoy Roy Mathews
+# Regenerates autogen_ins.txt, 32768 uniformly random accesses over 16384 word
+# addresses. trace_generator.py in the repository root generates other
+# patterns, lengths, address ranges and binary instruction files
 import os
-import random
-from random import randrange
- 
+import sys
+
 curr_dir = os.path.dirname(os.path.realpath(__file__))
-filepath = os.path.join(curr_dir, 'autogen_ins.txt')
-trans_type = ['W', 'R']
-with open(filepath,'w') as fp:
-    for x in range(32768):
-        trans_sel = random.choice(trans_type)
-        addr = hex(randrange(16384))
-        if(trans_sel == 'W'):
-            data = addr
-            fp.write(f'{trans_sel} {addr} {data}\n')
-        else:
-            fp.write(f'{trans_sel} {addr}\n')
-fp.close()
+sys.path.insert(0, os.path.dirname(curr_dir))
+from trace_generator import TraceGenerator, write_text_trace
 
+filepath = os.path.join(curr_dir, 'autogen_ins.txt')
+write_text_trace(TraceGenerator('uniform', 16384, 0.5).batches(32768), filepath)
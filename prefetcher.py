@@ -0,0 +1,31 @@
+# Author / Maintainer : Rejoy Roy Mathews
+
+class prefetcher(object):
+    '''Base class for hardware prefetchers. The cache passes every demand
+    access to the prefetcher, which returns the lines to prefetch.
+    line_size is the cache line size in Bytes, degree the number of lines
+    prefetched per trigger and latency the number of cache accesses a
+    prefetch takes to fill its line (0 fills the line immediately)
+    '''
+
+    def __init__(self, line_size : int = 4, degree : int = 1, latency : int = 0) -> None:
+        if degree < 1 or latency < 0:
+            raise ValueError('Prefetch degree must be at least 1 and latency must not be negative')
+        self._line_words = line_size // 4 # Words per cache line
+        self._degree     = degree
+        self._latency    = latency
+
+    def cache_line_acc(self, line_address : int, miss : bool, prefetch_hit : bool) -> list :
+        '''Runtime error if this function is invoked. This is meant to be
+        a purely virtual function which must be implemented in a derived class.
+        Derived classes accept the address of the first word of the accessed
+        line, whether the access missed and whether it hit a prefetched line,
+        and return the addresses of the lines to prefetch
+        '''
+        raise RuntimeError('Prefetcher does not define the implementation \
+              for this method. Create a derived class and implement this method')
+
+    @property
+    def latency(self) -> int:
+        '''Cache accesses a prefetch takes to fill its line'''
+        return self._latency
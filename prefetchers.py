@@ -0,0 +1,118 @@
+# Author / Maintainer : Rejoy Roy Mathews
+
+from prefetcher import prefetcher
+from collections import OrderedDict
+
+class NextLinePrefetcher(prefetcher):
+    '''Prefetch the "degree" lines following a line that missed. Hits on
+    prefetched lines trigger the next prefetches as well (tagged prefetching)
+    so that sequential streams stay ahead of the demand accesses
+    '''
+
+    def cache_line_acc(self, line_address : int, miss : bool, prefetch_hit : bool) -> list :
+        if not (miss or prefetch_hit):
+            return []
+        return [line_address + self._line_words*ahead for ahead in range(1, self._degree + 1)]
+
+    @property
+    def name(self) -> str:
+        '''Defines the prefetcher name'''
+        return 'Next line prefetcher'
+
+
+class StridePrefetcher(prefetcher):
+    '''Stride prefetcher without program counters. Accesses are grouped by
+    memory region and each region tracks the line it accessed last and the
+    stride between its last two accesses. Once the same stride is seen
+    twice in a row the "degree" lines that continue the stride are
+    prefetched. At most table_size regions are tracked, the least recently
+    accessed region is replaced first
+    '''
+
+    def __init__(self, line_size : int = 4, degree : int = 1, latency : int = 0,
+                 table_size : int = 64, region_size : int = 4096) -> None:
+        super().__init__(line_size, degree, latency)
+        if table_size < 1 or region_size <= 0 or (region_size & (region_size - 1)):
+            raise ValueError('Stride table size must be at least 1 and region size must be a power of 2')
+        self._table_size  = table_size
+        # Regions are region_size Bytes of 4 byte words
+        self._region_bits = max((region_size // 4).bit_length() - 1, 0)
+        # Region -> [last line address, stride, confidence]
+        self._stride_table = OrderedDict()
+
+    def cache_line_acc(self, line_address : int, miss : bool, prefetch_hit : bool) -> list :
+        region = line_address >> self._region_bits
+        entry = self._stride_table.get(region)
+        if entry is None:
+            if len(self._stride_table) >= self._table_size:
+                self._stride_table.popitem(last=False)
+            self._stride_table[region] = [line_address, 0, 0]
+            return []
+        self._stride_table.move_to_end(region)
+
+        stride = line_address - entry[0]
+        if stride == 0:
+            # Repeated accesses to a line carry no stride information
+            return []
+        if stride == entry[1]:
+            entry[2] = min(entry[2] + 1, 3)
+        else:
+            entry[1], entry[2] = stride, 0
+        entry[0] = line_address
+        if entry[2] < 1:
+            return []
+        return [line_address + stride*ahead for ahead in range(1, self._degree + 1)]
+
+    @property
+    def name(self) -> str:
+        '''Defines the prefetcher name'''
+        return 'Stride prefetcher'
+
+
+class StreamPrefetcher(prefetcher):
+    '''Stream buffer prefetcher. A miss that does not belong to a tracked
+    stream allocates a stream (replacing the least recently used one) that
+    prefetches the "degree" lines following the miss. Accesses within the
+    prefetched lines of a stream advance it, keeping "degree" lines
+    prefetched ahead of the latest access
+    '''
+
+    def __init__(self, line_size : int = 4, degree : int = 4, latency : int = 0,
+                 streams : int = 4) -> None:
+        super().__init__(line_size, degree, latency)
+        if streams < 1:
+            raise ValueError('Stream prefetcher needs at least 1 stream')
+        self._streams = streams
+        # Stream id -> address of the last line prefetched by the stream,
+        # ordered from least to most recently used
+        self._stream_tail = OrderedDict()
+        self._next_stream = 0
+
+    def cache_line_acc(self, line_address : int, miss : bool, prefetch_hit : bool) -> list :
+        if not (miss or prefetch_hit):
+            return []
+        window = self._line_words*self._degree
+        for stream, tail in self._stream_tail.items():
+            if tail - window < line_address <= tail:
+                # Access within the stream, top it up to degree lines ahead
+                self._stream_tail[stream] = line_address + window
+                self._stream_tail.move_to_end(stream)
+                return list(range(tail + self._line_words, line_address + window + 1, self._line_words))
+        if not miss:
+            return []
+
+        if len(self._stream_tail) >= self._streams:
+            self._stream_tail.popitem(last=False)
+        self._stream_tail[self._next_stream] = line_address + window
+        self._next_stream += 1
+        return list(range(line_address + self._line_words, line_address + window + 1, self._line_words))
+
+    @property
+    def name(self) -> str:
+        '''Defines the prefetcher name'''
+        return 'Stream buffer prefetcher'
+
+# Prefetchers selectable by name
+PREFETCHERS = {'next_line' : NextLinePrefetcher,
+               'stride'    : StridePrefetcher,
+               'stream'    : StreamPrefetcher}
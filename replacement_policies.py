@@ -0,0 +1,17 @@
+# Author / Maintainer : Rejoy Roy Mathews
+
+from LRU import OrderedLRU
+from PLRU import TreePLRU, BitPLRU
+from RRIP import SRRIP, BRRIP
+from FIFO import FIFO
+from RandomReplacement import RandomReplacement
+
+# Replacement policies selectable by name. Every policy is constructed with
+# the cache (size, associativity, line size)
+REPLACEMENT_POLICIES = {'lru'       : OrderedLRU,
+                        'tree_plru' : TreePLRU,
+                        'bit_plru'  : BitPLRU,
+                        'srrip'     : SRRIP,
+                        'brrip'     : BRRIP,
+                        'fifo'      : FIFO,
+                        'random'    : RandomReplacement}
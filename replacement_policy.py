@@ -6,10 +6,10 @@ class replacement_policy(object):
     attributes being configured
     '''
 
-    def __init__(self, size : int = 0, associativity : int = 0) -> None:
+    def __init__(self, size : int = 0, associativity : int = 0, line_size : int = 4) -> None:
         self._cache_size          = int(size)
         self._cache_associativity = int(associativity)
-        self._cache_entries       = int(self._cache_size / 4) # integer entries in the Cache are 4 bytes
+        self._cache_entries       = int(self._cache_size / line_size) # Cache entries hold one line each
         self._cache_sets          = int(self._cache_entries / self._cache_associativity)
 
     def compute_to_evict(self) -> None :
@@ -24,4 +24,26 @@ class replacement_policy(object):
         a purely virtual function which must be implemented in a derived class
         '''
         raise RuntimeError('Replacement policy does not define the implementation \
-              for this method. Create a derived class and implement this method')              
\ No newline at end of file
+              for this method. Create a derived class and implement this method')
+
+    def cache_ent_fill(self, cache_idx) -> None :
+        '''Called instead of cache_ent_acc when a cache entry is filled with a
+        new line. Policies that treat fills like any other access, such as
+        LRU, use this default
+        '''
+        self.cache_ent_acc(cache_idx)
+
+    def set_range_state(self, first_set : int, last_set : int) -> object :
+        '''Runtime error if this function is invoked. Derived classes return
+        the policy state of cache sets first_set to last_set - 1
+        '''
+        raise RuntimeError('Replacement policy does not define the implementation \
+              for this method. Create a derived class and implement this method')
+
+    def load_set_range_state(self, first_set : int, last_set : int, state : object) -> None :
+        '''Runtime error if this function is invoked. Derived classes replace
+        the policy state of cache sets first_set to last_set - 1 with the
+        output of set_range_state
+        '''
+        raise RuntimeError('Replacement policy does not define the implementation \
+              for this method. Create a derived class and implement this method')
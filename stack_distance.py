@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# Author / Maintainer : Rejoy Roy Mathews
+from cache import Cache
+from LRU import LRU
+from Memory import SparseMemory
+from cache_sweep import load_trace_arrays, print_sweep_table, write_sweep_csv, int_list
+from trace_reader import read_trace
+from array import array
+import argparse
+import sys
+
+STACK_DISTANCE_COLUMNS = ['cache_size', 'cache_assoc', 'cache_line_size', 'cache_sets',
+                          'cache_reads', 'cache_hits', 'cache_misses', 'hit_rate']
+# Set trees shorter than this are not compacted
+_COMPACT_MIN = 64
+
+class _GrowingFenwick(object):
+    '''Fenwick (binary indexed) tree over a sequence that grows at the end.
+    Positions are 1-based, append, add and prefix sums are O(log n)
+    '''
+    def __init__(self) -> None:
+        self._tree = [0]
+        # Sum of all the values in the tree
+        self.total = 0
+
+    def __len__(self) -> int:
+        return len(self._tree) - 1
+
+    def append(self, value : int) -> None:
+        '''Append a value at position len + 1'''
+        tree = self._tree
+        pos = len(tree)
+        # The new node covers (pos - lowbit(pos), pos]. Its other members
+        # are tiled by existing nodes reached by stripping low bits
+        node_sum = value
+        idx, stop = pos - 1, pos - (pos & -pos)
+        while idx > stop:
+            node_sum += tree[idx]
+            idx -= idx & -idx
+        tree.append(node_sum)
+        self.total += value
+
+    def add(self, pos : int, delta : int) -> None:
+        '''Add delta to the value at pos'''
+        tree = self._tree
+        size = len(tree)
+        while pos < size:
+            tree[pos] += delta
+            pos += pos & -pos
+        self.total += delta
+
+    def prefix(self, pos : int) -> int:
+        '''Sum of the values at positions 1 to pos'''
+        tree = self._tree
+        prefix_sum = 0
+        while pos > 0:
+            prefix_sum += tree[pos]
+            pos -= pos & -pos
+        return prefix_sum
+
+    def rebuild(self, count : int) -> None:
+        '''Replace the values by count ones. The node at pos of a tree of
+        ones covers lowbit(pos) positions'''
+        self._tree = [0] + [pos & -pos for pos in range(1, count + 1)]
+        self.total = count
+
+class _SetStack(_GrowingFenwick):
+    '''Fenwick tree over the accesses to one cache set, with the line of
+    every access so the tree can be compacted
+    '''
+    def __init__(self) -> None:
+        super().__init__()
+        self.lines = []
+        # Length at which compact is next called
+        self.compact_at = _COMPACT_MIN
+
+    def compact(self, last_pos : dict) -> None:
+        '''Once half of the accesses are stale, keep only the latest access of
+        every line, in order, and renumber the positions of the lines in
+        last_pos. Sets when to check again, twice the live lines'''
+        if len(self) >= 2*self.total:
+            live = [line for pos, line in enumerate(self.lines, 1) if last_pos[line] == pos]
+            for pos, line in enumerate(live, 1):
+                last_pos[line] = pos
+            self.lines = live
+            self.rebuild(len(live))
+        self.compact_at = max(2*self.total, _COMPACT_MIN)
+
+class StackDistance(object):
+    '''Single pass LRU stack distance (Mattson) analysis.
+    An LRU cache with S sets hits on an access when fewer than "associativity"
+    distinct lines of the same set were accessed since the previous access to
+    the line. For every set count the analysis keeps, per set, a Fenwick tree
+    over the set's accesses in which only the latest access of each line is
+    marked. The stack distance of an access is then the number of marked
+    accesses after the previous access to its line, an O(log n) query, and one
+    histogram of read distances per set count yields the hits of every
+    associativity at once. A set tree is rebuilt from its marked accesses
+    once it holds twice as many accesses as lines, so memory stays
+    proportional to the lines accessed.
+    Like Cache, every access allocates and updates the LRU order while only
+    reads are counted as hits or misses. Lines of cache_line_size Bytes are
+    decoded from word addresses like Cache does
+    '''
+    def __init__(self, cache_sizes : list, cache_assocs : list, cache_line_size : int = 4) -> None:
+        for value in list(cache_sizes) + list(cache_assocs) + [cache_line_size]:
+            if value <= 0 or (value & (value - 1)):
+                raise ValueError('Cache sizes, associativities and the line size must be powers of 2')
+        if cache_line_size < 4:
+            raise ValueError('Cache line size must be at least one 4 Byte word')
+
+        self._line_size  = cache_line_size
+        self._line_shift = (cache_line_size // 4).bit_length() - 1
+        self._configs = [(size, assoc, (size // cache_line_size) // assoc)
+                         for size in sorted(set(cache_sizes))
+                         for assoc in sorted(set(cache_assocs))
+                         if (size // cache_line_size) // assoc >= 1]
+        self._set_counts = sorted({sets for _, _, sets in self._configs})
+        self._max_assoc = max(assoc for _, assoc, _ in self._configs)
+        # Per set count : line -> position of its latest access in its set tree
+        self._last_pos = [{} for _ in self._set_counts]
+        # Per set count : set -> _SetStack over the accesses to the set
+        self._set_trees = [{} for _ in self._set_counts]
+        # Per set count : read stack distance histogram up to the max associativity
+        self._read_hist = [array('Q', [0]) * self._max_assoc for _ in self._set_counts]
+        self._reads = 0
+
+    def access(self, address : int, is_read : bool) -> None:
+        '''Account for one cache access'''
+        self._reads += is_read
+        max_assoc = self._max_assoc
+        line = address >> self._line_shift
+        for sets, last_pos, set_trees, read_hist in zip(self._set_counts, self._last_pos,
+                                                         self._set_trees, self._read_hist):
+            set_tree = set_trees.get(line & (sets - 1))
+            if set_tree is None:
+                set_tree = set_trees[line & (sets - 1)] = _SetStack()
+            pos = last_pos.get(line)
+            if pos is not None:
+                # Distinct lines accessed in the set since the previous access
+                distance = set_tree.total - set_tree.prefix(pos)
+                if is_read and distance < max_assoc:
+                    read_hist[distance] += 1
+                set_tree.add(pos, -1)
+            set_tree.append(1)
+            set_tree.lines.append(line)
+            pos = last_pos[line] = len(set_tree)
+            if pos >= set_tree.compact_at:
+                set_tree.compact(last_pos)
+
+    def results(self) -> list:
+        '''Returns one row per cache size and associativity'''
+        rows = []
+        for size, assoc, sets in self._configs:
+            hits = sum(self._read_hist[self._set_counts.index(sets)][:assoc])
+            rows.append({'cache_size' : size, 'cache_assoc' : assoc,
+                         'cache_line_size' : self._line_size, 'cache_sets' : sets,
+                         'cache_reads' : self._reads, 'cache_hits' : hits,
+                         'cache_misses' : self._reads - hits,
+                         'hit_rate' : round(hits / self._reads, 6) if self._reads else 0.0})
+        return rows
+
+def stack_distance_sweep(cache_ops_inp : str, cache_sizes : list, cache_assocs : list,
+                         cache_line_size : int = 4) -> list:
+    '''LRU hits and misses of every cache size x associativity combination
+    from a single streaming pass over an instruction file'''
+    analysis = StackDistance(cache_sizes, cache_assocs, cache_line_size)
+    access = analysis.access
+    for op, address, _ in read_trace(cache_ops_inp):
+        access(address, op == 'R')
+    return analysis.results()
+
+def validate_stack_distance(cache_ops_inp : str, rows : list, mem_size : int) -> list:
+    '''Simulate each row supported by Cache with the Cache and LRU models and
+    return the rows whose hits or misses differ'''
+    trace = load_trace_arrays(cache_ops_inp)
+    mismatches = []
+    for row in rows:
+        size, assoc, line_size = row['cache_size'], row['cache_assoc'], row['cache_line_size']
+        try:
+            cache = Cache('C0', size, assoc, 'wb', SparseMemory('M0', mem_size),
+                          LRU(size, assoc, line_size), line_size)
+        except ValueError:
+            continue
+        cache.access_batch(*trace)
+        _, _, hits, misses = cache.access_counts
+        if (hits, misses) != (row['cache_hits'], row['cache_misses']):
+            mismatches.append((row, hits, misses))
+    return mismatches
+
+def main():
+    parser = argparse.ArgumentParser(
+             description='LRU miss curves for many cache geometries from one pass over an instruction file.')
+    parser.add_argument('--cache_sizes', '-cs', default=','.join(str(1 << n) for n in range(6, 17)), type=int_list, help='Comma separated cache sizes. example: 1024,4096', metavar='cache_sizes', dest='cache_sizes')
+    parser.add_argument('--cache_assocs', '-ca', default='1,2,4,8,16', type=int_list, help='Comma separated cache associativities. example: 1,4,16', metavar='cache_assocs', dest='cache_assocs')
+    parser.add_argument('--cache_line_size', '-cls', default=4, type=int, help='The cache line size in bytes. example: 64', metavar='cache_line_size', dest='cache_line_size')
+    parser.add_argument('--validate', '-v', action='store_true', help='Cross check every configuration against the Cache and LRU models.', dest='validate')
+    parser.add_argument('--mem_size', '-ms', default=16384, type=int, help='The external memory size used for validation. example: 16384', metavar='mem_size', dest='mem_size')
+    parser.add_argument('--out_file', '-of', type=str, help='Write the results as CSV to this file instead of printing a table.', metavar='out_file', dest='out_file')
+    parser.add_argument('--ins_file', '-if', default='mem_ins_auto_gen/autogen_ins.txt', type=str, help='File with sequence of instructions for cache simulator.', metavar='ins_file', dest='ins_file')
+
+    args = parser.parse_args()
+
+    rows = stack_distance_sweep(args.ins_file, args.cache_sizes, args.cache_assocs,
+                                args.cache_line_size)
+    if args.out_file == '-':
+        write_sweep_csv(rows, sys.stdout, STACK_DISTANCE_COLUMNS)
+    elif args.out_file:
+        with open(args.out_file, 'w', newline='') as f:
+            write_sweep_csv(rows, f, STACK_DISTANCE_COLUMNS)
+    else:
+        print_sweep_table(rows, STACK_DISTANCE_COLUMNS)
+
+    if args.validate:
+        mismatches = validate_stack_distance(args.ins_file, rows, args.mem_size)
+        for row, hits, misses in mismatches:
+            print(f'Mismatch for cache size {row["cache_size"]} associativity {row["cache_assoc"]} : '
+                  f'stack distance hits/misses {row["cache_hits"]}/{row["cache_misses"]}, '
+                  f'Cache hits/misses {hits}/{misses}')
+        if mismatches:
+            sys.exit(1)
+        print('Stack distance results match the Cache and LRU models')
+
+if __name__ == '__main__':
+    main()
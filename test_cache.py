@@ -0,0 +1,150 @@
+# Author / Maintainer : Rejoy Roy Mathews
+from cache import Cache
+from Memory import SparseMemory
+from LRU import OrderedLRU
+from cache_metrics import CacheMetrics
+from replacement_policies import REPLACEMENT_POLICIES
+from array import array
+import io
+import itertools
+import random
+import unittest
+
+def make_cache(memory, size : int = 256, assoc : int = 4, write_policy : str = 'wb',
+               line_size : int = 4) -> Cache:
+    return Cache('C0', size, assoc, write_policy, memory,
+                 OrderedLRU(size, assoc, line_size), line_size)
+
+class TestAddressSpace(unittest.TestCase):
+    '''Addresses at and above 2**32 must not alias low addresses'''
+
+    def test_64_bit_memory_keeps_high_addresses_apart(self):
+        memory = SparseMemory('M0', 1 << 40)
+        cache = make_cache(memory)
+        cache.write_to_cache(2**32 + 5, 7)
+        cache.write_to_cache(2**32 - 1, 9)
+        self.assertEqual(cache.read_from_cache(5), 'X')
+        self.assertEqual(cache.read_from_cache(2**32 + 5), 7)
+        self.assertEqual(cache.read_from_cache(2**32 - 1), 9)
+        # Write back the dirty lines by filling their sets with other lines
+        for address in range(1 << 16, (1 << 16) + 1024):
+            cache.read_from_cache(address)
+        self.assertEqual(memory.memory_read(2**32 + 5), 7)
+        self.assertEqual(memory.memory_read(5), 'X')
+
+    def test_address_beyond_memory_is_rejected(self):
+        cache = make_cache(SparseMemory('M0', 1 << 20))
+        cache.write_to_cache(2**32 - 1, 1)
+        with self.assertRaises(ValueError):
+            cache.write_to_cache(2**32 + 5, 7)
+        self.assertFalse(cache.contains(5))
+
+    def test_multi_word_lines(self):
+        cache = make_cache(SparseMemory('M0', 1 << 32), line_size=16)
+        cache.write_to_cache(2**32 - 1, 3)
+        self.assertEqual(cache.read_from_cache(2**32 - 1), 3)
+        with self.assertRaises(ValueError):
+            cache.read_from_cache(2**32)
+
+class TestWriteTraffic(unittest.TestCase):
+    '''Read fills are not memory write traffic'''
+
+    def test_read_only_trace_writes_nothing(self):
+        for write_policy in ('wb', 'wt'):
+            for line_size in (4, 64):
+                with self.subTest(write_policy=write_policy, line_size=line_size):
+                    memory = SparseMemory('M0', 1 << 20)
+                    cache = make_cache(memory, write_policy=write_policy, line_size=line_size)
+                    for address in range(0, 4096, 7):
+                        cache.read_from_cache(address)
+                    self.assertEqual(cache.bytes_moved[1], 0)
+                    self.assertEqual(cache.busy_cycles, -(-cache.bytes_moved[0] // memory.bandwidth))
+                    if line_size > 4:
+                        self.assertEqual(memory.access_counts[1], 0)
+
+    def test_read_only_batch_writes_nothing(self):
+        for write_policy in ('wb', 'wt'):
+            with self.subTest(write_policy=write_policy):
+                cache = make_cache(SparseMemory('M0', 1 << 20), write_policy=write_policy)
+                addrs = array('Q', range(0, 4096, 7))
+                cache.access_batch(array('B', bytes(len(addrs))), addrs)
+                self.assertEqual(cache.bytes_moved[1], 0)
+
+def random_trace(length : int, addr_range : int, seed : int) -> list:
+    '''Half reads, half writes of random data to random addresses'''
+    rng = random.Random(seed)
+    return [('W', rng.randrange(addr_range), rng.randrange(1 << 32)) if rng.random() < 0.5
+            else ('R', rng.randrange(addr_range), None) for _ in range(length)]
+
+class TestLineData(unittest.TestCase):
+    '''Multi-word lines must hold the same data as a flat reference memory'''
+
+    def test_reads_return_last_write(self):
+        trace = random_trace(8000, 2048, seed=3)
+        for write_policy, line_size, r_policy in itertools.product(
+                ('wb', 'wt'), (4, 16, 64), REPLACEMENT_POLICIES):
+            with self.subTest(write_policy=write_policy, line_size=line_size, r_policy=r_policy):
+                memory = SparseMemory('M0', 1 << 20)
+                cache = Cache('C0', 1024, 4, write_policy, memory,
+                              REPLACEMENT_POLICIES[r_policy](1024, 4, line_size), line_size)
+                reference = {}
+                for op, address, data in trace:
+                    if op == 'W':
+                        cache.write_to_cache(address, data)
+                        reference[address] = data
+                    else:
+                        self.assertEqual(cache.read_from_cache(address),
+                                         reference.get(address, 'X'))
+                for address, data in reference.items():
+                    # Write back caches hold the only up to date copy of
+                    # dirty lines, write through caches never do
+                    if write_policy == 'wt' or not cache.contains(address):
+                        self.assertEqual(memory.memory_read(address), data)
+
+    def test_batch_matches_single_accesses(self):
+        trace = random_trace(8000, 2048, seed=4)
+        ops   = array('B', [op == 'W' for op, _, _ in trace])
+        addrs = array('Q', [address for _, address, _ in trace])
+        data  = array('Q', [data or 0 for _, _, data in trace])
+        for write_policy, line_size in itertools.product(('wb', 'wt'), (4, 16, 64)):
+            with self.subTest(write_policy=write_policy, line_size=line_size):
+                memories, caches = [], []
+                for _ in range(2):
+                    memories.append(SparseMemory('M0', 1 << 20))
+                    caches.append(make_cache(memories[-1], 1024, 4, write_policy, line_size))
+                hits = caches[0].access_batch(ops, addrs, data)
+                single_hits = array('B')
+                for op, address, wr_data in trace:
+                    single_hits.append(caches[1].contains(address))
+                    if op == 'W':
+                        caches[1].write_to_cache(address, wr_data)
+                    else:
+                        caches[1].read_from_cache(address)
+                self.assertEqual(hits, single_hits)
+                self.assertEqual(caches[0].access_counts, caches[1].access_counts)
+                self.assertEqual(caches[0].bytes_moved, caches[1].bytes_moved)
+                dumps = []
+                for cache, memory in zip(caches, memories):
+                    out = io.StringIO()
+                    cache.dump(out)
+                    memory.dump(out)
+                    dumps.append(out.getvalue())
+                self.assertTrue(dumps[0] == dumps[1], 'batch and single access dumps differ')
+
+class TestBatchOps(unittest.TestCase):
+    '''Batch accesses only take read and write op codes'''
+
+    def test_invalid_ops_are_rejected(self):
+        for ops in (['R', 'X'], [0, 2], array('B', [1, 3])):
+            for metrics in (False, True):
+                with self.subTest(ops=ops, metrics=metrics):
+                    cache = make_cache(SparseMemory('M0', 1 << 20))
+                    if metrics:
+                        # Instrumented caches issue the accesses one by one
+                        cache.set_metrics(CacheMetrics(cache.sets))
+                    with self.assertRaises(ValueError):
+                        cache.access_batch(ops, [1, 2], [5, 6])
+                    self.assertEqual(cache.access_counts, (0, 0, 0, 0))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+# Author / Maintainer : Rejoy Roy Mathews
+from cache_hierarchy import CacheHierarchy, INCLUSION_POLICIES, parse_level_params
+from Memory import SparseMemory
+from trace_generator import TraceGenerator
+import random
+import unittest
+
+LEVELS = ['L1:256:2:wb,L2:1024:4:wb,L3:4096:8:wb', 'L1:256:2:wt,L2:1024:4:wb',
+          'L1:64:1:wb,L2:256:4:wt', 'L1:256:4:wb,L2:256:16:wb,L3:2048:8:wt']
+
+def run_hierarchy(levels : str, inclusion : str, line_size : int = 4) -> CacheHierarchy:
+    '''Run a mixed read/write trace through a cache hierarchy'''
+    hierarchy = CacheHierarchy(parse_level_params(levels), SparseMemory('M0', 1 << 20),
+                               inclusion, line_size)
+    for batch in TraceGenerator('uniform', 4096, 0.5, seed=2).batches(20000):
+        for op, address, data in zip(*batch):
+            if op:
+                hierarchy.write(address, data)
+            else:
+                hierarchy.read(address)
+    return hierarchy
+
+class TestHierarchyInvariants(unittest.TestCase):
+    '''Every level combination must return the last written data and keep
+    the lines of the levels as the inclusion policy defines them'''
+
+    def check_inclusion(self, hierarchy : CacheHierarchy, inclusion : str, line_size : int,
+                        addr_range : int) -> None:
+        levels = hierarchy.levels
+        for address in range(0, addr_range, line_size // 4):
+            held = [cache.contains(address) for cache in levels]
+            for level_idx in range(len(levels) - 1):
+                if inclusion == 'inclusive' and held[level_idx]:
+                    self.assertTrue(held[level_idx + 1], f'{address} missing below level {level_idx}')
+            if inclusion == 'exclusive':
+                self.assertLessEqual(sum(held), 1, f'{address} held by several levels')
+
+    def test_reads_return_last_write(self):
+        rng = random.Random(1)
+        trace = [('W', rng.randrange(2048), rng.randrange(1 << 30)) if rng.random() < 0.5
+                 else ('R', rng.randrange(2048), None) for _ in range(5000)]
+        for levels in LEVELS:
+            for line_size in (4, 16, 64):
+                for inclusion in INCLUSION_POLICIES:
+                    level_params = parse_level_params(levels)
+                    if(any(params['cache_size'] // line_size < params['cache_assoc']
+                           for params in level_params) or
+                       (inclusion == 'exclusive' and
+                        any(params['cache_wr_policy'] != 'wb' for params in level_params[:-1]))):
+                        # Levels holding less lines than their associativity and
+                        # write through upper levels of exclusive hierarchies
+                        # are rejected
+                        continue
+                    with self.subTest(levels=levels, line_size=line_size, inclusion=inclusion):
+                        hierarchy = CacheHierarchy(level_params, SparseMemory('M0', 1 << 20),
+                                                   inclusion, line_size)
+                        reference = {}
+                        for acc_idx, (op, address, data) in enumerate(trace):
+                            if op == 'W':
+                                hierarchy.write(address, data)
+                                reference[address] = data
+                            else:
+                                self.assertEqual(hierarchy.read(address),
+                                                 reference.get(address, 'X'))
+                            if acc_idx % 997 == 0:
+                                self.check_inclusion(hierarchy, inclusion, line_size, 2048)
+                        self.check_inclusion(hierarchy, inclusion, line_size, 2048)
+
+class TestExclusiveTraffic(unittest.TestCase):
+    '''Victims placed in the level below are bytes written by the evicting level'''
+
+    def test_victims_count_as_bytes_written(self):
+        for line_size in (4, 16):
+            with self.subTest(line_size=line_size):
+                hierarchy = run_hierarchy('L1:256:2:wb,L2:1024:4:wb,L3:4096:8:wb',
+                                          'exclusive', line_size)
+                levels = hierarchy.levels
+                for upper, lower in zip(levels, levels[1:]):
+                    self.assertGreater(upper.bytes_moved[1], 0)
+                    self.assertEqual(upper.bytes_moved[1], lower.access_counts[1]*line_size)
+
+if __name__ == '__main__':
+    unittest.main()
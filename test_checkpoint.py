@@ -0,0 +1,57 @@
+# Author / Maintainer : Rejoy Roy Mathews
+from replacement_policies import REPLACEMENT_POLICIES
+from trace_generator import TraceGenerator, write_text_trace
+from test_parallel import simulate
+import itertools
+import os
+import tempfile
+import unittest
+
+class TestCheckpointSplitRun(unittest.TestCase):
+    '''A run split at a checkpoint must end in the state of the full run'''
+
+    @classmethod
+    def setUpClass(cls):
+        cls._tmp_dir = tempfile.TemporaryDirectory()
+        cls.trace_file = os.path.join(cls._tmp_dir.name, 'ins.txt')
+        write_text_trace(TraceGenerator('zipf', 1 << 14, 0.3, seed=5).batches(5000),
+                         cls.trace_file)
+        with open(cls.trace_file) as f:
+            lines = f.readlines()
+        cls.roi_files = []
+        for part, part_lines in enumerate((lines[:2500], lines[2500:])):
+            cls.roi_files.append(os.path.join(cls._tmp_dir.name, f'ins_{part}.txt'))
+            with open(cls.roi_files[-1], 'w') as f:
+                f.writelines(part_lines)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._tmp_dir.cleanup()
+
+    def read_dump(self, dump_file : str) -> str:
+        with open(dump_file) as f:
+            return f.read()
+
+    def test_split_run_matches_full_run(self):
+        tmp_dir = self._tmp_dir.name
+        checkpoint = os.path.join(tmp_dir, 'warm.ckpt')
+        for r_policy, write_policy, line_size in itertools.product(
+                REPLACEMENT_POLICIES, ('wb', 'wt'), (4, 16)):
+            with self.subTest(r_policy=r_policy, write_policy=write_policy, line_size=line_size):
+                params = {'cache_wr_policy' : write_policy, 'cache_line_size' : line_size,
+                          'replacement_policy' : r_policy, 'mem_sparse' : True}
+                full_dump = os.path.join(tmp_dir, 'full.txt')
+                simulate(self.trace_file, full_dump, 1, **params)
+                simulate(self.roi_files[0], None, 1, checkpoint_out=checkpoint, **params)
+                roi_stats = []
+                for workers in (1, 2):
+                    roi_dump = os.path.join(tmp_dir, f'roi_{workers}.txt')
+                    roi_stats.append(simulate(self.roi_files[1], roi_dump, workers,
+                                              checkpoint_in=checkpoint, **params))
+                    self.assertTrue(self.read_dump(full_dump) == self.read_dump(roi_dump),
+                                    'split and full run dumps differ')
+                # The statistics only cover the region of interest
+                self.assertEqual(len(set(roi_stats)), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+# Author / Maintainer : Rejoy Roy Mathews
+from cache import Cache
+from Memory import Memory
+from LRU import LRU, OrderedLRU
+from replacement_policy import replacement_policy
+from trace_reader import read_trace
+import os
+import unittest
+
+TRACE_FILES    = ['ins/default_ins.txt', 'mem_ins_auto_gen/autogen_ins.txt']
+CACHE_SIZES    = [64, 256, 1024, 4096]
+CACHE_ASSOCS   = [1, 2, 4, 8, 16]
+WRITE_POLICIES = ['wb', 'wt']
+
+class LockstepLRU(replacement_policy):
+    '''Drives LRU and OrderedLRU with the same accesses and fails on the first
+    eviction where they pick different victims'''
+
+    def __init__(self, size : int = 64, associativity : int = 1, line_size : int = 4) -> None:
+        super().__init__(size, associativity, line_size)
+        self.reference = LRU(size, associativity, line_size)
+        self.ordered   = OrderedLRU(size, associativity, line_size)
+        self.evictions = 0
+
+    def compute_to_evict(self, set_id : int) -> int:
+        victim = self.reference.compute_to_evict(set_id)
+        ordered_victim = self.ordered.compute_to_evict(set_id)
+        if victim != ordered_victim:
+            raise AssertionError(f'Set {set_id} : LRU evicts entry {victim}, '
+                                 f'OrderedLRU evicts entry {ordered_victim}')
+        self.evictions += 1
+        return victim
+
+    def cache_ent_acc(self, cache_idx) -> None:
+        self.reference.cache_ent_acc(cache_idx)
+        self.ordered.cache_ent_acc(cache_idx)
+
+class TestLRUConformance(unittest.TestCase):
+    '''OrderedLRU must pick the same victims as the reference LRU model'''
+
+    def test_same_victims(self):
+        root = os.path.dirname(os.path.abspath(__file__))
+        for trace_file in TRACE_FILES:
+            trace = list(read_trace(os.path.join(root, trace_file)))
+            for size in CACHE_SIZES:
+                for assoc in CACHE_ASSOCS:
+                    for write_policy in WRITE_POLICIES:
+                        with self.subTest(trace=trace_file, size=size, assoc=assoc,
+                                          write_policy=write_policy):
+                            policy = LockstepLRU(size, assoc)
+                            cache = Cache('C0', size, assoc, write_policy,
+                                          Memory('M0', 16384), policy)
+                            for op, address, data in trace:
+                                if op == 'R':
+                                    cache.read_from_cache(address)
+                                else:
+                                    cache.write_to_cache(address, data)
+                            if trace_file == 'mem_ins_auto_gen/autogen_ins.txt':
+                                # Every configuration overflows on this trace
+                                self.assertGreater(policy.evictions, 0)
+
+if __name__ == '__main__':
+    unittest.main()
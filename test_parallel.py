@@ -0,0 +1,69 @@
+# Author / Maintainer : Rejoy Roy Mathews
+from cache_simulator import cache_simulator
+from replacement_policies import REPLACEMENT_POLICIES
+from trace_generator import TraceGenerator, write_text_trace
+from contextlib import redirect_stdout
+import io
+import itertools
+import os
+import tempfile
+import unittest
+
+def simulate(trace_file : str, dump_file : str, workers : int, **params) -> str:
+    '''Run the simulator on an instruction file, returns the printed stats'''
+    cache_sim_params = {'cache_name' : 'C0', 'cache_size' : 1024, 'cache_assoc' : 4,
+                        'cache_wr_policy' : 'wb', 'mem_name' : 'M0', 'mem_size' : 1 << 20,
+                        'dump_file' : dump_file}
+    cache_sim_params.update(params)
+    stats = io.StringIO()
+    with redirect_stdout(stats):
+        cache_simulator(cache_sim_params).run(trace_file, workers)
+    return stats.getvalue()
+
+class TestParallelMatchesSerial(unittest.TestCase):
+    '''Splitting the cache sets over workers must give exactly the stats and
+    the cache and memory dump of the serial run'''
+
+    @classmethod
+    def setUpClass(cls):
+        cls._tmp_dir = tempfile.TemporaryDirectory()
+        cls.trace_file = os.path.join(cls._tmp_dir.name, 'ins.txt')
+        # Mostly reads over a range much larger than the writes cover, so
+        # read fills touch memory pages that are never written
+        write_text_trace(TraceGenerator('uniform', 1 << 20, 0.05, seed=1).batches(4000),
+                         cls.trace_file)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._tmp_dir.cleanup()
+
+    def test_dumps_match(self):
+        for write_policy, line_size, sparse in itertools.product(('wb', 'wt'), (4, 16),
+                                                                  (False, True)):
+            with self.subTest(write_policy=write_policy, line_size=line_size, sparse=sparse):
+                dumps = []
+                for workers in (1, 3):
+                    dump_file = os.path.join(self._tmp_dir.name, f'dump_{workers}.txt')
+                    stats = simulate(self.trace_file, dump_file, workers,
+                                     cache_wr_policy=write_policy, cache_line_size=line_size,
+                                     mem_sparse=sparse)
+                    with open(dump_file) as f:
+                        dumps.append((stats, f.read()))
+                self.assertEqual(dumps[0][0], dumps[1][0])
+                self.assertTrue(dumps[0][1] == dumps[1][1], 'serial and parallel dumps differ')
+
+    def test_replacement_policies_match(self):
+        for r_policy in REPLACEMENT_POLICIES:
+            with self.subTest(r_policy=r_policy):
+                dumps = []
+                for workers in (1, 4):
+                    dump_file = os.path.join(self._tmp_dir.name, f'dump_{workers}.txt')
+                    stats = simulate(self.trace_file, dump_file, workers, cache_line_size=16,
+                                     replacement_policy=r_policy, mem_sparse=True)
+                    with open(dump_file) as f:
+                        dumps.append((stats, f.read()))
+                self.assertEqual(dumps[0][0], dumps[1][0])
+                self.assertTrue(dumps[0][1] == dumps[1][1], 'serial and parallel dumps differ')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+# Author / Maintainer : Rejoy Roy Mathews
+from trace_reader import BINARY_TRACE_MAGIC
+from array import array
+from itertools import accumulate
+import argparse
+import math
+import random
+import sys
+
+TRACE_PATTERNS = ('uniform', 'sequential', 'strided', 'zipf', 'pointer_chase', 'working_set')
+# Accesses generated per batch
+TRACE_BATCH = 1 << 16
+# Odd multiplier spreading the Zipfian ranks over the address range
+_ZIPF_SCATTER = 2654435761
+
+class TraceGenerator(object):
+    '''Synthetic instruction trace generator.
+    Word addresses are generated within base to base + addr_range - 1
+    following an access pattern :
+    uniform       - uniformly random addresses.
+    sequential    - consecutive addresses, wrapping around the range.
+    strided       - addresses "stride" words apart, wrapping around the range.
+    zipf          - addresses drawn from a Zipfian distribution with the given
+                    exponent, the most popular addresses are spread over the range.
+    pointer_chase - walk of a random cycle over the nodes of node_size words,
+                    every access depends on the previous one like a linked list.
+    working_set   - uniformly random addresses within a working set of
+                    working_set words that moves every phase_length accesses.
+    A write_ratio fraction of the accesses are writes of the address as data.
+    Accesses are generated in batches of (ops, addrs, data) arrays, the format
+    of Cache.access_batch, and the same seed always gives the same trace
+    '''
+    def __init__(self, pattern : str = 'uniform', addr_range : int = 16384,
+                 write_ratio : float = 0.5, seed : int = None, base : int = 0,
+                 stride : int = 16, zipf_exponent : float = 0.99, node_size : int = 16,
+                 working_set : int = 1024, phase_length : int = 16384) -> None:
+
+        if pattern not in TRACE_PATTERNS:
+            raise ValueError(f'Valid trace patterns are {", ".join(TRACE_PATTERNS)}')
+        if addr_range <= 0 or base < 0:
+            raise ValueError('Trace address range must be > 0 and the base address >= 0')
+        if not 0.0 <= write_ratio <= 1.0:
+            raise ValueError('Trace write ratio must be within 0 and 1')
+        if stride <= 0 or node_size <= 0 or working_set <= 0 or phase_length <= 0:
+            raise ValueError('Trace stride, node size, working set and phase length must be > 0')
+
+        self._pattern     = pattern
+        self._addr_range  = addr_range
+        self._write_ratio = write_ratio
+        self._base        = base
+        self._stride      = stride
+        self._rng         = random.Random(seed)
+        # Accesses generated so far
+        self._pos         = 0
+
+        if pattern == 'zipf':
+            # Cumulative weights of the ranks, rank r has weight 1/r**exponent
+            self._zipf_cum = list(accumulate(1.0 / rank**zipf_exponent
+                                             for rank in range(1, addr_range + 1)))
+            self._zipf_scatter = _ZIPF_SCATTER if math.gcd(_ZIPF_SCATTER, addr_range) == 1 else 1
+        elif pattern == 'pointer_chase':
+            self._node_size = min(node_size, addr_range)
+            nodes = addr_range // self._node_size
+            order = list(range(nodes))
+            self._rng.shuffle(order)
+            # Next node of every node, a single cycle through all the nodes
+            self._next_node = array('Q', [0]) * nodes
+            for node, next_node in zip(order, order[1:] + order[:1]):
+                self._next_node[node] = next_node
+            self._node = order[0]
+        elif pattern == 'working_set':
+            self._working_set  = min(working_set, addr_range)
+            self._phase_length = phase_length
+            self._ws_base      = 0
+
+    def _offsets(self, count : int) -> list:
+        '''Returns the next count addresses relative to the base'''
+        rnd = self._rng.random
+        addr_range = self._addr_range
+        pos = self._pos
+        if self._pattern == 'uniform':
+            return [int(rnd()*addr_range) for _ in range(count)]
+        if self._pattern == 'sequential':
+            return [acc % addr_range for acc in range(pos, pos + count)]
+        if self._pattern == 'strided':
+            stride = self._stride
+            return [(acc*stride) % addr_range for acc in range(pos, pos + count)]
+        if self._pattern == 'zipf':
+            ranks = self._rng.choices(range(addr_range), cum_weights=self._zipf_cum, k=count)
+            scatter = self._zipf_scatter
+            return [(rank*scatter) % addr_range for rank in ranks]
+        if self._pattern == 'pointer_chase':
+            next_node, node, node_size = self._next_node, self._node, self._node_size
+            offsets = []
+            for _ in range(count):
+                node = next_node[node]
+                offsets.append(node*node_size)
+            self._node = node
+            return offsets
+        # Working set, generated one phase (or the part of it in this batch) at a time
+        offsets = []
+        working_set = self._working_set
+        while len(offsets) < count:
+            if pos % self._phase_length == 0:
+                self._ws_base = self._rng.randrange(addr_range - working_set + 1)
+            chunk = min(count - len(offsets), self._phase_length - pos % self._phase_length)
+            ws_base = self._ws_base
+            offsets.extend([ws_base + int(rnd()*working_set) for _ in range(chunk)])
+            pos += chunk
+        return offsets
+
+    def batch(self, count : int) -> tuple:
+        '''Returns the next count accesses as op (1 for writes), address and
+        data arrays. The data of an access is its address'''
+        offsets = self._offsets(count)
+        self._pos += count
+        rnd = self._rng.random
+        write_ratio = self._write_ratio
+        ops = array('B', [rnd() < write_ratio for _ in range(count)])
+        if self._base:
+            addrs = array('Q', [self._base + offset for offset in offsets])
+        else:
+            addrs = array('Q', offsets)
+        return ops, addrs, addrs
+
+    def batches(self, length : int, batch_size : int = TRACE_BATCH):
+        '''Generator over the batches of the next length accesses'''
+        while length > 0:
+            count = min(length, batch_size)
+            yield self.batch(count)
+            length -= count
+
+def generate_trace_arrays(length : int, **params) -> tuple:
+    '''Generate a whole trace as op, address and data arrays, see TraceGenerator'''
+    ops, addrs = array('B'), array('Q')
+    for batch_ops, batch_addrs, _ in TraceGenerator(**params).batches(length):
+        ops.extend(batch_ops)
+        addrs.extend(batch_addrs)
+    return ops, addrs, addrs
+
+def write_text_trace(batches, out_file : str) -> int:
+    '''Write batches of accesses to a text instruction file, "-" writes to
+    stdout. Each batch is formatted and written at once. Returns the number
+    of instructions written'''
+    if out_file == '-':
+        out = open(sys.stdout.fileno(), 'w', buffering=1 << 20, closefd=False)
+    else:
+        out = open(out_file, 'w', buffering=1 << 20)
+    count = 0
+    with out:
+        for ops, addrs, data in batches:
+            out.write(''.join([f'W {hex(address)} {hex(wr_data)}\n' if op else f'R {hex(address)}\n'
+                               for op, address, wr_data in zip(ops, addrs, data)]))
+            count += len(ops)
+    return count
+
+def write_binary_trace_batches(batches, out_file : str) -> int:
+    '''Write batches of accesses to a binary instruction file. A record
+    (op, 3 pad Bytes, address, data) is three little endian 32-bit words with
+    the op in the first, so the records of a batch are interleaved into one
+    word array and written at once. Returns the number of instructions written'''
+    count = 0
+    with open(out_file, 'wb') as f:
+        f.write(BINARY_TRACE_MAGIC)
+        for ops, addrs, data in batches:
+            records = array('I', [0]) * (3*len(ops))
+            try:
+                records[0::3] = array('I', ops)
+                records[1::3] = array('I', addrs)
+                records[2::3] = array('I', data)
+            except OverflowError:
+                raise ValueError('Binary instruction files hold 32-bit addresses and data')
+            if sys.byteorder == 'big':
+                records.byteswap()
+            f.write(records)
+            count += len(ops)
+    return count
+
+def main():
+    parser = argparse.ArgumentParser(
+             description='Generate a synthetic instruction file.')
+    parser.add_argument('--pattern', '-tp', default='uniform', type=str, choices=TRACE_PATTERNS, help='The access pattern. example: zipf', metavar='pattern', dest='pattern')
+    parser.add_argument('--length', '-tl', default=32768, type=int, help='Number of instructions. example: 1000000', metavar='length', dest='length')
+    parser.add_argument('--addr_range', '-ar', default=16384, type=int, help='Number of word addresses accessed. example: 1048576', metavar='addr_range', dest='addr_range')
+    parser.add_argument('--base', '-b', default=0, type=lambda arg: int(arg, 0), help='First word address of the range. example: 0x10000', metavar='base', dest='base')
+    parser.add_argument('--write_ratio', '-wr', default=0.5, type=float, help='Fraction of write instructions. example: 0.3', metavar='write_ratio', dest='write_ratio')
+    parser.add_argument('--seed', '-s', default=None, type=int, help='Random seed, the same seed gives the same instructions. example: 1', metavar='seed', dest='seed')
+    parser.add_argument('--stride', '-st', default=16, type=int, help='Stride in words of the strided pattern. example: 16', metavar='stride', dest='stride')
+    parser.add_argument('--zipf_exponent', '-ze', default=0.99, type=float, help='Exponent of the zipf pattern. example: 1.2', metavar='zipf_exponent', dest='zipf_exponent')
+    parser.add_argument('--node_size', '-ns', default=16, type=int, help='Node size in words of the pointer_chase pattern. example: 16', metavar='node_size', dest='node_size')
+    parser.add_argument('--working_set', '-ws', default=1024, type=int, help='Working set size in words of the working_set pattern. example: 4096', metavar='working_set', dest='working_set')
+    parser.add_argument('--phase_length', '-pl', default=16384, type=int, help='Instructions before the working set moves. example: 100000', metavar='phase_length', dest='phase_length')
+    parser.add_argument('--format', '-fmt', default='text', type=str, choices=['text', 'binary'], help='The instruction file format', metavar='format', dest='format')
+    parser.add_argument('--out_file', '-of', required=True, type=str, help='Instruction file to write, "-" writes text to stdout.', metavar='out_file', dest='out_file')
+
+    args = parser.parse_args()
+
+    generator = TraceGenerator(args.pattern, args.addr_range, args.write_ratio, args.seed, args.base,
+                               args.stride, args.zipf_exponent, args.node_size,
+                               args.working_set, args.phase_length)
+    if args.format == 'binary':
+        write_binary_trace_batches(generator.batches(args.length), args.out_file)
+    else:
+        write_text_trace(generator.batches(args.length), args.out_file)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# Author / Maintainer : Rejoy Roy Mathews
+import argparse
+import gzip
+import io
+import lzma
+import mmap
+import struct
+import sys
+
+# Read buffer size for instruction files
+TRACE_BUFFER_SIZE = 1 << 20
+# Binary instruction files start with this magic followed by fixed width
+# records of (op, address, data). op is 0 for reads and 1 for writes, the
+# address and data are 32-bit words. Records are little endian
+BINARY_TRACE_MAGIC  = b'CSIMTRC1'
+BINARY_TRACE_RECORD = struct.Struct('<B3xII')
+# Records converted per buffered write
+BINARY_TRACE_BATCH  = 1 << 16
+
+def open_trace(cache_ops_inp : str) -> io.TextIOBase:
+    '''Open an instruction file for buffered text reading.
+    Files ending in ".gz" or ".xz" are decompressed on the fly and "-"
+    reads the instructions from stdin
+    '''
+    if cache_ops_inp == '-':
+        return open(sys.stdin.fileno(), 'r', buffering=TRACE_BUFFER_SIZE, closefd=False)
+    if cache_ops_inp.endswith('.gz'):
+        return io.TextIOWrapper(io.BufferedReader(gzip.open(cache_ops_inp, 'rb'), TRACE_BUFFER_SIZE))
+    if cache_ops_inp.endswith('.xz'):
+        return io.TextIOWrapper(io.BufferedReader(lzma.open(cache_ops_inp, 'rb'), TRACE_BUFFER_SIZE))
+    return open(cache_ops_inp, 'r', buffering=TRACE_BUFFER_SIZE)
+
+def is_binary_trace(cache_ops_inp : str) -> bool:
+    '''Check if an instruction file is in the binary trace format'''
+    if cache_ops_inp == '-' or cache_ops_inp.endswith(('.gz', '.xz')):
+        return False
+    with open(cache_ops_inp, 'rb') as f:
+        return f.read(len(BINARY_TRACE_MAGIC)) == BINARY_TRACE_MAGIC
+
+def read_binary_trace(cache_ops_inp : str):
+    '''Generator over the instructions of a binary instruction file.
+    The file is memory-mapped and the records are decoded in bulk, yielding
+    the same (op, address, data) tuples as read_trace
+    '''
+    with open(cache_ops_inp, 'rb') as f, \
+         mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if mm[:len(BINARY_TRACE_MAGIC)] != BINARY_TRACE_MAGIC:
+            raise ValueError(f'{cache_ops_inp} is not a binary instruction file')
+        records = memoryview(mm)[len(BINARY_TRACE_MAGIC):]
+        if len(records) % BINARY_TRACE_RECORD.size:
+            records.release()
+            raise ValueError(f'{cache_ops_inp} : truncated binary instruction record')
+        decoded = BINARY_TRACE_RECORD.iter_unpack(records)
+        try:
+            for op, address, data in decoded:
+                if op:
+                    yield 'W', address, data
+                else:
+                    yield 'R', address, None
+        finally:
+            # Drop the views on the mapping so it can be closed
+            del decoded
+            records.release()
+
+def read_trace(cache_ops_inp : str):
+    '''Generator over the instructions of an instruction file.
+    Each line is parsed as it is read and yielded as an (op, address, data)
+    tuple, data is None for reads. Blank lines are skipped and anything after
+    the operands (such as comments) is ignored. Binary instruction files are
+    detected by their magic and replayed through read_binary_trace
+    '''
+    if is_binary_trace(cache_ops_inp):
+        yield from read_binary_trace(cache_ops_inp)
+        return
+
+    with open_trace(cache_ops_inp) as f:
+        for line in f:
+            ins = line.split()
+            if not ins:
+                continue
+            if ins[0] == 'R':
+                yield 'R', int(ins[1],0), None
+            elif ins[0] == 'W':
+                data = int(ins[2],0)
+                if data >> 32:
+                    raise ValueError(f'{cache_ops_inp} : write data {ins[2]} of "{line.strip()}" '
+                                     'does not fit in a 32-bit memory word')
+                yield 'W', int(ins[1],0), data
+            else:
+                raise ValueError('Specify "R" for read operations or  \
+                                "W" for write operations as the opcode for the operation')
+
+def write_binary_trace(trace, out_file : str) -> int:
+    '''Write (op, address, data) instructions to a binary instruction file.
+    Records are packed into a buffer and written in batches. Returns the
+    number of instructions written
+    '''
+    record_size = BINARY_TRACE_RECORD.size
+    pack_into   = BINARY_TRACE_RECORD.pack_into
+    buf = bytearray(record_size * BINARY_TRACE_BATCH)
+    count = 0
+    with open(out_file, 'wb') as f:
+        f.write(BINARY_TRACE_MAGIC)
+        pos = 0
+        for op, address, data in trace:
+            pack_into(buf, pos, op == 'W', address, data or 0)
+            pos += record_size
+            count += 1
+            if pos == len(buf):
+                f.write(buf)
+                pos = 0
+        f.write(memoryview(buf)[:pos])
+    return count
+
+def convert_trace(ins_file : str, out_file : str) -> int:
+    '''Convert a text instruction file, such as ins/default_ins.txt or the
+    mem_ins_autogen.py output, to a binary instruction file'''
+    return write_binary_trace(read_trace(ins_file), out_file)
+
+def main():
+    parser = argparse.ArgumentParser(
+             description='Convert a text instruction file to a binary instruction file.')
+    parser.add_argument('--ins_file', '-if', required=True, type=str, help='Text instruction file to convert. "-" reads stdin.', metavar='ins_file', dest='ins_file')
+    parser.add_argument('--out_file', '-of', required=True, type=str, help='Binary instruction file to write.', metavar='out_file', dest='out_file')
+
+    args = parser.parse_args()
+
+    count = convert_trace(args.ins_file, args.out_file)
+    print(f'{args.ins_file} : {count} instructions written to {args.out_file}')
+
+if __name__ == '__main__':
+    main()